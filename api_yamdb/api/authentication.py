@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import CustomUser
+from .cache import get_cache
+
+TOKEN_VERSION_KEY = 'api:token_version:{user_id}'
+VERSION_CLAIM = 'ver'
+CLAIM_FIELDS = ('username', 'role', 'is_superuser')
+# Изменение этих полей отзывает выданные пользователю токены.
+REVOKE_FIELDS = CLAIM_FIELDS + ('is_active',)
+
+# Поля в порядке модели, как их ожидает Model.from_db.
+USER_FIELDS = tuple(
+    field.attname for field in CustomUser._meta.concrete_fields
+    if field.attname in ('id', 'username', 'role', 'is_superuser',
+                         'is_active')
+)
+
+
+class LRUCache:
+    """Ограниченный по размеру кэш в памяти процесса со сроком жизни."""
+
+    def __init__(self, size_setting, ttl_setting):
+        self.size_setting = size_setting
+        self.ttl_setting = ttl_setting
+        self.lock = threading.Lock()
+        self.items = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = getattr(settings, self.ttl_setting) if ttl is None else min(
+            ttl, getattr(settings, self.ttl_setting)
+        )
+        with self.lock:
+            self.items[key] = (value, time.monotonic() + ttl)
+            self.items.move_to_end(key)
+            while len(self.items) > getattr(settings, self.size_setting):
+                self.items.popitem(last=False)
+
+    def pop(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+tokens = LRUCache('AUTH_TOKEN_CACHE_SIZE', 'AUTH_CACHE_TTL')
+users = LRUCache('AUTH_USER_CACHE_SIZE', 'AUTH_CACHE_TTL')
+
+
+def user_claims(user):
+    return {field: getattr(user, field) for field in CLAIM_FIELDS}
+
+
+def revoke_values(user):
+    return tuple(getattr(user, field) for field in REVOKE_FIELDS)
+
+
+class RoleAccessToken(AccessToken):
+    """Токен доступа с ролью пользователя и версией его токенов."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, value in user_claims(user).items():
+            token[claim] = value
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+def token_version(user_id):
+    """Текущая версия токенов пользователя (None — пользователя нет).
+
+    Версия хранится в кэше API_CACHE_ALIAS AUTH_TOKEN_VERSION_TTL секунд:
+    если кэш не общий для процессов, другие процессы принимают отозванный
+    токен не дольше этого срока.
+    """
+    cache = get_cache()
+    key = TOKEN_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = CustomUser.objects.filter(pk=user_id).values_list(
+            'token_version', flat=True
+        ).first()
+        cache.set(key, version, settings.AUTH_TOKEN_VERSION_TTL)
+    return version
+
+
+def forget_token_version(user_id):
+    get_cache().delete(TOKEN_VERSION_KEY.format(user_id=user_id))
+
+
+def revoke_tokens(user):
+    """Отзыв всех выданных пользователю токенов с ролью.
+
+    Вызывается сигналом при сохранении пользователя с изменёнными
+    REVOKE_FIELDS; после QuerySet.update() его нужно вызвать явно.
+    """
+    CustomUser.objects.filter(pk=user.pk).update(
+        token_version=F('token_version') + 1
+    )
+    user.refresh_from_db(fields=('token_version',))
+    forget_token_version(user.pk)
+    transaction.on_commit(partial(forget_token_version, user.pk))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация с кэшем проверенных токенов и пользователей.
+
+    Проверенный токен хранится по исходной строке до истечения срока его
+    действия, поэтому подпись повторно не проверяется. Пользователь
+    восстанавливается как объект модели с отложенными полями (как после
+    only()) из полей USER_FIELDS: для токенов RoleAccessToken — из
+    утверждений токена после сверки версии, для остальных — из кэша по id.
+    Кэш сбрасывается сигналами при изменении пользователя; изменения
+    в других процессах учитываются по истечении AUTH_CACHE_TTL секунд.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = tokens.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            tokens.set(raw_token, token, ttl=token['exp'] - time.time())
+        return token
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM in validated_token:
+            return self.get_token_user(validated_token)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        values = users.get(user_id)
+        if values is None:
+            user = super().get_user(validated_token)
+            users.set(user_id, tuple(
+                getattr(user, field) for field in USER_FIELDS
+            ))
+            return user
+        user = CustomUser.from_db('default', USER_FIELDS, values)
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        return user
+
+    def get_token_user(self, validated_token):
+        """Пользователь из утверждений токена без запроса к БД.
+
+        Токены выдаются только активным пользователям; деактивация, смена
+        имени или роли увеличивают версию и отзывают старые токены.
+        """
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if token_version(user_id) != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed(
+                'Токен отозван, получите новый', code='token_revoked'
+            )
+        values = {
+            field: validated_token.get(field) for field in CLAIM_FIELDS
+        }
+        values.update(id=user_id, is_active=True)
+        return CustomUser.from_db(
+            'default', USER_FIELDS, [values[field] for field in USER_FIELDS]
+        )
@@ -0,0 +1,161 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from heapq import nlargest
+
+from django.db.models import Count
+
+from reviews.models import Category, Genre, Title
+from .constants import AUTOCOMPLETE_MAX_LIMIT
+from .indexes import RebuiltIndex
+
+TITLES = 'titles'
+GENRES = 'genres'
+CATEGORIES = 'categories'
+MEMO_SIZE = 10000
+KEY_END = chr(0x10FFFF)
+
+
+def normalize(text):
+    return text.casefold().replace('ё', 'е')
+
+
+def word_keys(name):
+    """Ключи индекса: название с начала каждого слова."""
+    name = normalize(name)
+    return {name[match.start():] for match in re.finditer(r'\w+', name)}
+
+
+def load_titles(**filters):
+    for title in Title.objects.filter(**filters).values(
+        'id', 'name', 'rating', 'rating_count'
+    ):
+        rank = (
+            -1 if title['rating'] is None else title['rating'],
+            title.pop('rating_count')
+        )
+        yield title['id'], title['name'], rank, title
+
+
+def load_groups(model, **filters):
+    for group in model.objects.filter(**filters).annotate(
+        titles_count=Count('titles')
+    ).values('id', 'name', 'slug', 'titles_count'):
+        yield group['id'], group['name'], (group['titles_count'],), {
+            'name': group['name'], 'slug': group['slug']
+        }
+
+
+LOADERS = {
+    TITLES: load_titles,
+    GENRES: lambda **filters: load_groups(Genre, **filters),
+    CATEGORIES: lambda **filters: load_groups(Category, **filters),
+}
+
+
+class PrefixIndex(RebuiltIndex):
+    """Отсортированный индекс названий для подсказок при вводе.
+
+    Для каждого вида объектов хранится отсортированный список пар
+    (ключ, id), где ключ — название в нижнем регистре с начала одного из
+    слов; поиск по префиксу — бинарный поиск диапазона ключей. Лучшие
+    результаты по префиксу запоминаются (LRU); изменение объекта сбрасывает
+    только префиксы его ключей. Изменения в этом процессе применяются по
+    сигналам, изменения других процессов — полной перестройкой раз
+    в API_AUTOCOMPLETE_MAX_AGE секунд.
+    """
+
+    max_age_setting = 'API_AUTOCOMPLETE_MAX_AGE'
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        super().__init__()
+
+    def clear(self):
+        with self.lock:
+            self.keys = {kind: [] for kind in LOADERS}
+            self.entries = {kind: {} for kind in LOADERS}
+            self.memo = OrderedDict()
+            self.built_at = None
+
+    def build(self):
+        """Полная перестройка; запросы к БД выполняются вне блокировки."""
+        keys = {kind: [] for kind in LOADERS}
+        entries = {kind: {} for kind in LOADERS}
+        for kind, loader in LOADERS.items():
+            for pk, name, rank, data in loader():
+                entries[kind][pk] = (rank, data, word_keys(name))
+                keys[kind].extend(
+                    (key, pk) for key in entries[kind][pk][2]
+                )
+            keys[kind].sort()
+        with self.lock:
+            self.keys = keys
+            self.entries = entries
+            self.memo = OrderedDict()
+            self.built_at = time.monotonic()
+
+    def forget(self, kind, keys):
+        """Сброс запомненных результатов для всех префиксов ключей."""
+        for key in keys:
+            for length in range(1, len(key) + 1):
+                self.memo.pop((kind, key[:length]), None)
+
+    def add(self, kind, pk, name, rank, data):
+        with self.lock:
+            self.remove(kind, pk)
+            keys = word_keys(name)
+            self.entries[kind][pk] = (rank, data, keys)
+            for key in keys:
+                insort(self.keys[kind], (key, pk))
+            self.forget(kind, keys)
+
+    def remove(self, kind, pk):
+        with self.lock:
+            entry = self.entries[kind].pop(pk, None)
+            if entry is None:
+                return
+            for key in entry[2]:
+                index = bisect_left(self.keys[kind], (key, pk))
+                del self.keys[kind][index]
+            self.forget(kind, entry[2])
+
+    def refresh(self, kind, *pks):
+        """Перечитывание объектов из БД, если индекс построен."""
+        if not self.is_built():
+            return
+        rows = list(LOADERS[kind](pk__in=pks))
+        with self.lock:
+            for pk in pks:
+                self.remove(kind, pk)
+            for row in rows:
+                self.add(kind, *row)
+
+    def search(self, kind, prefix, limit):
+        prefix = normalize(prefix).strip()
+        if not prefix:
+            return []
+        with self.lock:
+            entries = self.entries[kind]
+            top = self.memo.get((kind, prefix))
+            if top is None:
+                keys = self.keys[kind]
+                found = {pk for _, pk in keys[
+                    bisect_left(keys, (prefix,)):
+                    bisect_left(keys, (prefix + KEY_END,))
+                ]}
+                top = nlargest(
+                    AUTOCOMPLETE_MAX_LIMIT, found,
+                    key=lambda pk: (entries[pk][0], -pk)
+                )
+                self.memo[(kind, prefix)] = top
+                if len(self.memo) > MEMO_SIZE:
+                    self.memo.popitem(last=False)
+            else:
+                self.memo.move_to_end((kind, prefix))
+            return [entries[pk][1] for pk in top[:limit]]
+
+
+index = PrefixIndex()
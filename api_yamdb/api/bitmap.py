@@ -0,0 +1,171 @@
+import threading
+import time
+
+from reviews.models import GenreTitle, Title
+from .indexes import RebuiltIndex
+
+BYTE_BITS = tuple(
+    tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)
+)
+
+
+def make_bitmap(ids):
+    """Битовая карта (целое число) с установленными битами ids."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    data = bytearray(max(ids) // 8 + 1)
+    for pk in ids:
+        data[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(data, 'little')
+
+
+def popcount(bitmap):
+    return bin(bitmap).count('1')
+
+
+def bitmap_ids(bitmap, start=0, stop=None):
+    """id из битовой карты с порядковыми номерами start..stop-1.
+
+    Карта просматривается по байтам с таблицей номеров битов: байты до
+    начала страницы пропускаются целиком, без перебора отдельных id.
+    """
+    ids = []
+    position = 0
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for offset, byte in enumerate(data):
+        if not byte:
+            continue
+        bits = BYTE_BITS[byte]
+        if position + len(bits) <= start:
+            position += len(bits)
+            continue
+        for bit in bits:
+            if stop is not None and position >= stop:
+                return ids
+            if position >= start:
+                ids.append(offset * 8 + bit)
+            position += 1
+    return ids
+
+
+def load_records(titles):
+    """Жанры, категория и год произведений из titles по id."""
+    records = {
+        pk: {'genre': set(), 'category': category, 'year': year}
+        for pk, year, category in titles.values_list(
+            'id', 'year', 'category__slug'
+        )
+    }
+    for pk, genre in GenreTitle.objects.filter(
+        title__in=titles
+    ).values_list('title_id', 'genre__slug'):
+        records[pk]['genre'].add(genre)
+    return records
+
+
+def record_values(record):
+    """Пары (фильтр, значение), под которые попадает произведение."""
+    for name, values in record.items():
+        if name != 'genre':
+            values = () if values is None else (values,)
+        for value in values:
+            yield name, value
+
+
+class BitmapList:
+    """Отфильтрованный список произведений для Paginator.
+
+    Количество считается по битовой карте, из БД загружается только
+    срез id текущей страницы.
+    """
+
+    ordered = True
+
+    def __init__(self, queryset, bitmap):
+        self.queryset = queryset
+        self.bitmap = bitmap
+
+    def count(self):
+        return popcount(self.bitmap)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        ids = bitmap_ids(self.bitmap, item.start or 0, item.stop)
+        return list(self.queryset.filter(pk__in=ids).order_by('pk'))
+
+
+class BitmapIndex(RebuiltIndex):
+    """Битовые карты id произведений по жанрам, категориям и годам.
+
+    Изменения произведений и их жанров применяются по сигналам; изменение
+    жанров и категорий, а также изменения других процессов учитываются
+    полной перестройкой (не реже раза в API_BITMAP_INDEX_MAX_AGE секунд).
+    """
+
+    max_age_setting = 'API_BITMAP_INDEX_MAX_AGE'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        super().__init__()
+
+    def clear(self):
+        with self.lock:
+            self.titles = {}
+            self.all = 0
+            self.bitmaps = {'genre': {}, 'category': {}, 'year': {}}
+            self.built_at = None
+
+    def build(self):
+        titles = load_records(Title.objects.all())
+        groups = {'genre': {}, 'category': {}, 'year': {}}
+        for pk, record in titles.items():
+            for name, value in record_values(record):
+                groups[name].setdefault(value, []).append(pk)
+        bitmaps = {
+            name: {value: make_bitmap(ids) for value, ids in values.items()}
+            for name, values in groups.items()
+        }
+        with self.lock:
+            self.titles = titles
+            self.all = make_bitmap(titles)
+            self.bitmaps = bitmaps
+            self.built_at = time.monotonic()
+
+    def remove(self, pk):
+        record = self.titles.pop(pk, None)
+        if record is None:
+            return
+        bit = 1 << pk
+        self.all &= ~bit
+        for name, value in record_values(record):
+            self.bitmaps[name][value] &= ~bit
+
+    def refresh(self, *pks):
+        """Перечитывание произведений из БД, если индекс построен."""
+        if not self.is_built():
+            return
+        records = load_records(Title.objects.filter(pk__in=pks))
+        with self.lock:
+            for pk in pks:
+                self.remove(pk)
+            for pk, record in records.items():
+                bit = 1 << pk
+                self.titles[pk] = record
+                self.all |= bit
+                for name, value in record_values(record):
+                    bitmaps = self.bitmaps[name]
+                    bitmaps[value] = bitmaps.get(value, 0) | bit
+
+    def resolve(self, filters):
+        """Пересечение карт по фильтрам вида {'genre': slug, ...}."""
+        with self.lock:
+            bitmap = self.all
+            for name, value in filters.items():
+                bitmap &= self.bitmaps[name].get(value, 0)
+            return bitmap
+
+
+index = BitmapIndex()
@@ -0,0 +1,90 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from .metrics import registry
+
+VERSION_KEY = 'api:{namespace}:version'
+RESPONSE_KEY = 'api:{namespace}:{version}:{kind}:{digest}'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_version(namespace):
+    """Текущая версия кэша пространства имён."""
+    cache = get_cache()
+    key = VERSION_KEY.format(namespace=namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(*namespaces):
+    """Сброс кэша сменой версии: старые ключи больше не читаются."""
+    cache = get_cache()
+    for namespace in namespaces:
+        key = VERSION_KEY.format(namespace=namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def get_or_set(key, default):
+    """Значение из кэша или результат default(), сохранённый в кэш."""
+    cache = get_cache()
+    value = cache.get(key)
+    if value is None:
+        value = default()
+        cache.set(key, value, settings.API_CACHE_TIMEOUT)
+    return value
+
+
+def make_key(namespace, request, kind='response'):
+    """Ключ ответа по пути и отсортированным параметрам запроса."""
+    query = urlencode(sorted(
+        (param, value)
+        for param, values in request.query_params.lists()
+        for value in values
+    ))
+    digest = hashlib.md5(
+        f'{request.path}?{query}'.encode()
+    ).hexdigest()
+    return RESPONSE_KEY.format(
+        namespace=namespace,
+        version=get_version(namespace),
+        kind=kind,
+        digest=digest
+    )
+
+
+class CachedListMixin:
+    """Кэширование ответа на получение списка объектов."""
+
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        if not settings.API_RESPONSE_CACHE:
+            return super().list(request, *args, **kwargs)
+        cache = get_cache()
+        key = make_key(self.cache_namespace, request)
+        data = cache.get(key)
+        registry.inc('api_cache_requests_total', {
+            'namespace': self.cache_namespace,
+            'result': 'miss' if data is None else 'hit',
+        })
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        return response
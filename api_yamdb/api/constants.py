@@ -8,3 +8,16 @@ ERROR_REVIEW_AUTHOR_UNIQUE = (
 )
 MAX_LENGHT = 256
 INVALID_SYMBOLS = r'[a-zA-Z0-9.@+-_]'
+PAGINATION_QUERY_PARAM = 'pagination'
+PAGINATION_CURSOR = 'cursor'
+CACHE_CATEGORIES = 'categories'
+CACHE_GENRES = 'genres'
+CACHE_TITLES = 'titles'
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+FACETS_QUERY_PARAM = 'facets'
+FACET_YEAR_BUCKET = 10
+LEADERBOARD_LIMIT = 10
+LEADERBOARD_MAX_LIMIT = 100
+SIMILAR_TITLES_LIMIT = 10
+RECOMMENDATIONS_LIMIT = 10
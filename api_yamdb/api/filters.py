@@ -1,6 +1,9 @@
 import django_filters
+from django.db.models import F
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
 
 from reviews.models import Title
+from reviews.search import search
 
 
 class TitleFilter(django_filters.FilterSet):
@@ -10,3 +13,41 @@ class TitleFilter(django_filters.FilterSet):
     class Meta:
         model = Title
         fields = ('name', 'year', 'genre', 'category')
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск по параметру search с ранжированием."""
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param)
+        if not text:
+            return queryset
+        return search(queryset, text)
+
+
+class RankingOrderingFilter(OrderingFilter):
+    """Сортировка, в которой rating — предрассчитанный взвешенный рейтинг.
+
+    Произведения без рассчитанного рейтинга идут в конце списка.
+    """
+
+    ranking_fields = {'rating': 'ranking__bayesian_rating'}
+
+    def to_expression(self, field):
+        name = field.lstrip('-')
+        if name not in self.ranking_fields:
+            return field
+        expression = F(self.ranking_fields[name])
+        if field.startswith('-'):
+            return expression.desc(nulls_last=True)
+        return expression.asc(nulls_last=True)
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+        return queryset.order_by(
+            *(self.to_expression(field) for field in ordering)
+        )
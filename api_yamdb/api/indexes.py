@@ -0,0 +1,50 @@
+import threading
+import time
+
+from django.conf import settings
+
+
+class RebuiltIndex:
+    """Индекс в памяти процесса, периодически перестраиваемый целиком.
+
+    Подклассы задают clear() и build(), которые сбрасывают и заполняют
+    индекс и выставляют built_at, и имя настройки max_age_setting:
+    изменения других процессов учитываются перестройкой не реже раза
+    в столько секунд.
+    """
+
+    max_age_setting = None
+
+    def __init__(self):
+        self.build_lock = threading.Lock()
+        self.clear()
+
+    def is_built(self):
+        return self.built_at is not None
+
+    def is_fresh(self):
+        built_at = self.built_at
+        return built_at is not None and (
+            time.monotonic() - built_at
+            <= getattr(settings, self.max_age_setting)
+        )
+
+    def ensure_built(self):
+        """Построение индекса одним потоком.
+
+        Пока устаревший индекс перестраивается, остальные потоки
+        пользуются прежним; до первого построения и после invalidate()
+        они ждут окончания перестройки.
+        """
+        if self.is_fresh():
+            return
+        if not self.build_lock.acquire(blocking=not self.is_built()):
+            return
+        try:
+            if not self.is_fresh():
+                self.build()
+        finally:
+            self.build_lock.release()
+
+    def invalidate(self):
+        self.built_at = None
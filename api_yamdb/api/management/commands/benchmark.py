@@ -0,0 +1,361 @@
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+from io import StringIO
+
+import requests
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.authentication import RoleAccessToken
+from api.urls import router
+from reviews.models import ADMIN, CustomUser, OutboxEmail, Review
+
+BASELINE_PATH = 'benchmarks/baseline.json'
+BENCHMARK_USERNAME = 'benchmark-admin'
+PERCENTILES = (50, 95, 99)
+ROUTES = (
+    ('users-list', 'GET', '/api/v1/users/', None),
+    ('users-detail', 'GET', '/api/v1/users/{username}/', None),
+    ('users-me', 'GET', '/api/v1/users/me/', None),
+    ('users-recommendations', 'GET', '/api/v1/users/me/recommendations/',
+     None),
+    ('categories-list', 'GET', '/api/v1/categories/', None),
+    ('categories-detail', 'DELETE', '/api/v1/categories/missing/', None),
+    ('genres-list', 'GET', '/api/v1/genres/', None),
+    ('genres-detail', 'DELETE', '/api/v1/genres/missing/', None),
+    ('titles-list', 'GET', '/api/v1/titles/', None),
+    ('titles-filter', 'GET',
+     '/api/v1/titles/?genre={genre}&category={category}&year={year}', None),
+    ('titles-search', 'GET', '/api/v1/titles/?search=Произведение', None),
+    ('titles-rating', 'GET', '/api/v1/titles/?ordering=-rating', None),
+    ('titles-detail', 'GET', '/api/v1/titles/{title}/', None),
+    ('titles-similar', 'GET', '/api/v1/titles/{title}/similar/', None),
+    ('leaderboards-top', 'GET', '/api/v1/leaderboards/top/?genre={genre}',
+     None),
+    ('leaderboards-trending', 'GET', '/api/v1/leaderboards/trending/',
+     None),
+    ('review-list', 'GET', '/api/v1/titles/{title}/reviews/', None),
+    ('review-cursor', 'GET',
+     '/api/v1/titles/{title}/reviews/?pagination=cursor', None),
+    ('review-detail', 'GET', '/api/v1/titles/{title}/reviews/{review}/',
+     None),
+    ('reviews-search', 'GET', '/api/v1/reviews/?search=Отзыв', None),
+    ('comment-list', 'GET',
+     '/api/v1/titles/{title}/reviews/{review}/comments/', None),
+    ('comment-detail', 'GET',
+     '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/', None),
+    ('autocomplete', 'GET', '/api/v1/autocomplete/?q=Про', None),
+    ('sign_up', 'POST', '/api/v1/auth/signup/',
+     {'username': '{username}', 'email': '{email}'}),
+    ('get_token', 'POST', '/api/v1/auth/token/',
+     {'username': '{username}', 'confirmation_code': 'invalid'}),
+)
+
+
+def percentile(values, rank):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(0, -(-rank * len(ordered) // 100) - 1)
+    return ordered[index]
+
+
+def relative_p95(results):
+    """p95 маршрутов в долях медианы p95 того же прогона.
+
+    Доли мало зависят от машины и числа запросов, поэтому их можно
+    сравнивать с базовым замером, снятым в другом окружении.
+    """
+    median = statistics.median(
+        result['p95'] for result in results.values()
+    ) or 1
+    return {name: result['p95'] / median for name, result in results.items()}
+
+
+def route_parameters():
+    """Объекты с наибольшим количеством отзывов и комментариев.
+
+    Возвращает параметры маршрутов, пользователя для замеров и признак
+    того, что он создан для них.
+    """
+    review = (
+        Review.objects.annotate(comments_count=Count('comments'))
+        .order_by('-comments_count').select_related('title').first()
+    )
+    if review is None or not review.comments.exists():
+        raise CommandError(
+            'Для замеров нужен отзыв с комментариями: загрузите данные '
+            'или используйте --generate'
+        )
+    title = review.title
+    genre = title.genre.first()
+    user, created = CustomUser.objects.get_or_create(
+        username=BENCHMARK_USERNAME,
+        defaults={'email': f'{BENCHMARK_USERNAME}@yamdb.fake', 'role': ADMIN}
+    )
+    return {
+        'username': user.username,
+        'email': user.email,
+        'title': title.pk,
+        'review': review.pk,
+        'comment': review.comments.first().pk,
+        'genre': genre.slug if genre else '',
+        'category': title.category.slug if title.category else '',
+        'year': title.year,
+    }, user, created
+
+
+def private_caches():
+    """Настройки кэшей в памяти процесса вместо настроенных.
+
+    Замер на временной базе не должен читать и очищать общие кэши.
+    """
+    return {
+        alias: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': f'benchmark-{alias}',
+        }
+        for alias in settings.CACHES
+    }
+
+
+class Command(BaseCommand):
+    help = 'замер производительности эндпоинтов API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='количество запросов к каждому эндпоинту'
+        )
+        parser.add_argument(
+            '--url',
+            help='адрес запущенного сервера; по умолчанию тестовый клиент'
+        )
+        parser.add_argument(
+            '--token', help='JWT администратора для режима --url'
+        )
+        parser.add_argument('--baseline', default=BASELINE_PATH)
+        parser.add_argument(
+            '--threshold', type=float,
+            help=(
+                'допустимый рост p95 в долях медианы прогона относительно '
+                'базового замера; без него время не сравнивается'
+            )
+        )
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='сохранить результаты как базовый замер'
+        )
+        parser.add_argument(
+            '--generate', action='store_true',
+            help='замер на временной базе с синтетическими данными'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--titles', type=int, default=2000)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+
+    def check_routes(self):
+        sample = dict.fromkeys(
+            ('username', 'email', 'title', 'review', 'comment', 'genre',
+             'category', 'year'), 1
+        )
+        names = {resolve(path.format(**sample).split('?')[0]).url_name
+                 for _, _, path, _ in ROUTES
+                 if not path.startswith('/api/v1/auth/')}
+        missing = {url.name for url in router.urls} - names
+        if missing:
+            raise CommandError(
+                f'Нет замеров для эндпоинтов: {", ".join(sorted(missing))}'
+            )
+
+    def make_request(self, client, base_url, token):
+        if base_url is None:
+            def request(method, path, data):
+                with CaptureQueriesContext(connection) as context:
+                    response = getattr(client, method.lower())(path, data)
+                return response.status_code, len(context.captured_queries)
+        else:
+            session = requests.Session()
+            session.headers['Authorization'] = f'Bearer {token}'
+
+            def request(method, path, data):
+                response = session.request(
+                    method, base_url.rstrip('/') + path, data=data
+                )
+                return response.status_code, None
+        return request
+
+    def measure(self, request, method, path, data, count):
+        timings = []
+        queries = None
+        status_code = None
+        started = time.perf_counter()
+        for _ in range(count):
+            request_started = time.perf_counter()
+            status_code, queries = request(method, path, data)
+            timings.append((time.perf_counter() - request_started) * 1000)
+        elapsed = time.perf_counter() - started
+        result = {
+            f'p{rank}': round(percentile(timings, rank), 3)
+            for rank in PERCENTILES
+        }
+        result.update(
+            rps=round(count / elapsed, 1),
+            queries=queries,
+            status=status_code
+        )
+        return result
+
+    def run(self, options):
+        """Замер всех маршрутов.
+
+        Созданный для замера администратор и письма, поставленные в
+        очередь запросами регистрации, после замера удаляются.
+        """
+        parameters, user, created = route_parameters()
+        started = timezone.now()
+        try:
+            return self.run_routes(options, parameters, user)
+        finally:
+            OutboxEmail.objects.filter(
+                recipient=user.email, created_at__gte=started
+            ).delete()
+            if created:
+                user.delete()
+
+    def run_routes(self, options, parameters, user):
+        token = options['token'] or str(RoleAccessToken.for_user(user))
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        request = self.make_request(client, options['url'], token)
+        results = {}
+        for name, method, path, data in ROUTES:
+            path = path.format(**parameters)
+            if data is not None:
+                data = {key: value.format(**parameters)
+                        for key, value in data.items()}
+            results[name] = self.measure(
+                request, method, path, data, options['requests']
+            )
+            self.stdout.write(
+                f'{name:<18} {results[name]["status"]} '
+                f'p50={results[name]["p50"]:.2f}мс '
+                f'p95={results[name]["p95"]:.2f}мс '
+                f'p99={results[name]["p99"]:.2f}мс '
+                f'{results[name]["rps"]} запр/с '
+                f'запросов к БД: {results[name]["queries"]}'
+            )
+        return results
+
+    def run_generated(self, options):
+        old_name = connection.creation.create_test_db(
+            verbosity=0, serialize=False
+        )
+        try:
+            with tempfile.TemporaryDirectory() as path:
+                call_command(
+                    'generate_data', path=path, seed=options['seed'],
+                    users=options['users'], titles=options['titles'],
+                    reviews=options['reviews'],
+                    comments=options['comments'], stdout=StringIO()
+                )
+                call_command(
+                    'import_data', path=path, fast=True,
+                    checkpoint=os.path.join(path, 'checkpoint.json'),
+                    stdout=StringIO()
+                )
+            return self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def compare(self, results, baseline, threshold):
+        """Сравнение с базовым замером.
+
+        Статус и число запросов к БД сравниваются всегда, время — только
+        с порогом threshold и относительно медианы своего прогона.
+        """
+        regressions = []
+        if threshold is not None:
+            relative = relative_p95(results)
+            expected_relative = relative_p95(baseline)
+        for name, result in results.items():
+            expected = baseline.get(name)
+            if expected is None:
+                regressions.append(
+                    f'{name}: нет базового замера, обновите его '
+                    'с --update-baseline'
+                )
+                continue
+            if result['status'] != expected['status']:
+                regressions.append(
+                    f'{name}: статус {result["status"]} вместо '
+                    f'{expected["status"]}'
+                )
+            if (threshold is not None
+                    and relative[name]
+                    > expected_relative[name] * (1 + threshold)):
+                regressions.append(
+                    f'{name}: p95 {relative[name]:.2f} медианы прогона > '
+                    f'{expected_relative[name]:.2f}'
+                )
+            if (result['queries'] is not None
+                    and expected['queries'] is not None
+                    and result['queries'] > expected['queries']):
+                regressions.append(
+                    f'{name}: запросов к БД {result["queries"]} > '
+                    f'{expected["queries"]}'
+                )
+        return regressions
+
+    def handle(self, *args, **options):
+        self.check_routes()
+        if options['url'] and options['generate']:
+            raise CommandError('--generate несовместим с --url')
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                API_RESPONSE_CACHE=False
+            ):
+                if options['generate']:
+                    with override_settings(CACHES=private_caches()):
+                        results = self.run_generated(options)
+                else:
+                    results = self.run(options)
+        finally:
+            request_logger.setLevel(level)
+        if options['update_baseline']:
+            os.makedirs(
+                os.path.dirname(options['baseline']) or '.', exist_ok=True
+            )
+            with open(options['baseline'], 'w', encoding='utf8') as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS('Базовый замер сохранён'))
+            return
+        if not os.path.exists(options['baseline']):
+            raise CommandError(
+                f'Нет базового замера {options["baseline"]}: '
+                'запустите с --update-baseline'
+            )
+        with open(options['baseline'], encoding='utf8') as file:
+            baseline = json.load(file)
+        regressions = self.compare(results, baseline, options['threshold'])
+        if regressions:
+            raise CommandError(
+                'Обнаружена деградация:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Деградации не обнаружено'))
@@ -0,0 +1,222 @@
+import atexit
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from copy import deepcopy
+
+from django.conf import settings
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+METRICS = {
+    'http_requests_total': (
+        COUNTER, 'Количество запросов по представлению и статусу', None
+    ),
+    'http_request_duration_seconds': (
+        HISTOGRAM, 'Время обработки запроса', LATENCY_BUCKETS
+    ),
+    'db_queries_per_request': (
+        HISTOGRAM, 'Количество запросов к БД на HTTP-запрос', QUERY_BUCKETS
+    ),
+    'db_query_duration_seconds': (
+        HISTOGRAM, 'Суммарное время запросов к БД на HTTP-запрос',
+        LATENCY_BUCKETS
+    ),
+    'api_cache_requests_total': (
+        COUNTER, 'Обращения к кэшу списков (result=hit|miss)', None
+    ),
+    'view_requests_total': (
+        COUNTER, 'Запросы, учтённые QueryTimingMiddleware', None
+    ),
+    'view_db_queries_total': (
+        COUNTER, 'Запросы к БД по представлению', None
+    ),
+    'view_db_seconds_total': (
+        COUNTER, 'Время запросов к БД по представлению', None
+    ),
+    'view_serialize_seconds_total': (
+        COUNTER, 'Время сериализации по представлению', None
+    ),
+    'view_render_seconds_total': (
+        COUNTER, 'Время рендеринга ответа по представлению', None
+    ),
+    'view_duration_seconds_total': (
+        COUNTER, 'Время обработки запроса по представлению', None
+    ),
+    'import_rows_total': (
+        COUNTER, 'Строки, загруженные import_data', None
+    ),
+    'import_duration_seconds_total': (
+        COUNTER, 'Время загрузки import_data', None
+    ),
+}
+FLUSH_INTERVAL = 1
+
+
+class Registry:
+    """Реестр метрик процесса.
+
+    Если задан METRICS_MULTIPROC_DIR, каждый процесс периодически
+    сохраняет свои значения в файл <dir>/metrics_<pid>_<uuid>.json, а
+    выдача /metrics суммирует файлы всех процессов. Имя файла уникально
+    для запуска процесса: воркер с повторно выданным pid не затирает
+    счётчики завершившегося, и суммы не уменьшаются. После fork дочерний
+    процесс начинает с пустого реестра, чтобы не учитывать значения
+    родителя дважды.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.values = {}
+        self.flushed = 0
+        self.file_name = f'metrics_{os.getpid()}_{uuid.uuid4().hex}.json'
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+        self.flush()
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * len(buckets), 0, 0]
+            index = bisect_left(buckets, value)
+            if index < len(buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+        self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            values = deepcopy(self.values)
+        return [
+            [name, list(map(list, labels)), value]
+            for (name, labels), value in values.items()
+        ]
+
+    def flush(self, force=False):
+        """Запись значений процесса в файл для выдачи /metrics.
+
+        Пока файл пишет один поток, остальные запись пропускают;
+        принудительная запись ждёт его завершения.
+        """
+        directory = settings.METRICS_MULTIPROC_DIR
+        if not directory:
+            return
+        if not self.flush_lock.acquire(blocking=force):
+            return
+        try:
+            now = time.monotonic()
+            if not force and now - self.flushed < FLUSH_INTERVAL:
+                return
+            self.flushed = now
+            with tempfile.NamedTemporaryFile(
+                'w', encoding='utf8', dir=directory, suffix='.tmp',
+                delete=False
+            ) as file:
+                json.dump(self.snapshot(), file)
+            os.replace(file.name, os.path.join(directory, self.file_name))
+        finally:
+            self.flush_lock.release()
+
+    def collect(self):
+        """Значения всех процессов, сложенные по имени и меткам."""
+        samples = [self.snapshot()]
+        directory = settings.METRICS_MULTIPROC_DIR
+        if directory:
+            own_path = os.path.join(directory, self.file_name)
+            for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+                if path == own_path:
+                    continue
+                try:
+                    with open(path, encoding='utf8') as file:
+                        samples.append(json.load(file))
+                except (OSError, ValueError):
+                    continue
+        merged = {}
+        for sample in samples:
+            for name, labels, value in sample:
+                key = (name, tuple(map(tuple, labels)))
+                merged[key] = merge(merged.get(key), value)
+        return merged
+
+
+def merge(total, value):
+    if total is None:
+        return value
+    if isinstance(value, list):
+        return [
+            [left + right for left, right in zip(total[0], value[0])],
+            total[1] + value[1],
+            total[2] + value[2],
+        ]
+    return total + value
+
+
+def escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{escape(value)}"' for key, value in labels)
+    return f'{{{pairs}}}'
+
+
+def render(values):
+    """Текстовый формат Prometheus."""
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        series = sorted(
+            (labels, value) for (metric, labels), value in values.items()
+            if metric == name
+        )
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind == COUNTER:
+                lines.append(f'{name}{format_labels(labels)} {value}')
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{name}_bucket'
+                    f'{format_labels(labels + (("le", bound),))} '
+                    f'{cumulative}'
+                )
+            lines.append(
+                f'{name}_bucket{format_labels(labels + (("le", "+Inf"),))} '
+                f'{count}'
+            )
+            lines.append(f'{name}_sum{format_labels(labels)} {total}')
+            lines.append(f'{name}_count{format_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+os.register_at_fork(after_in_child=registry.reset)
+atexit.register(lambda: registry.flush(force=True))
@@ -0,0 +1,293 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import registry
+
+slow_query_logger = logging.getLogger('api.slow_queries')
+
+STATS_FIELDS = (
+    'requests', 'queries', 'db_time', 'serialize_time', 'render_time',
+    'total_time'
+)
+# Счётчики /metrics, в которые выгружаются показатели по представлениям.
+STATS_METRICS = dict(zip(STATS_FIELDS, (
+    'view_requests_total', 'view_db_queries_total', 'view_db_seconds_total',
+    'view_serialize_seconds_total', 'view_render_seconds_total',
+    'view_duration_seconds_total'
+)))
+
+_stats = {}
+_stats_lock = threading.Lock()
+# Последние записанные медленные запросы (LRU не больше
+# SLOW_QUERY_MEMO_SIZE), чтобы память не росла с числом разных запросов.
+SLOW_QUERY_MEMO_SIZE = 1000
+_slow_queries = OrderedDict()
+_slow_queries_lock = threading.Lock()
+# QueryTiming текущего запроса для учёта времени сериализации.
+current_timing = ContextVar('current_timing', default=None)
+
+
+def record_stats(view, queries, db_time, serialize_time, render_time,
+                 total_time):
+    """Накопление показателей запроса по представлению.
+
+    Показатели также добавляются к счётчикам STATS_METRICS реестра
+    метрик и отдаются по /metrics.
+    """
+    values = dict(zip(STATS_FIELDS, (
+        1, queries, db_time, serialize_time, render_time, total_time
+    )))
+    with _stats_lock:
+        stats = _stats.setdefault(view, dict.fromkeys(STATS_FIELDS, 0))
+        for field, value in values.items():
+            stats[field] += value
+    for field, value in values.items():
+        registry.inc(STATS_METRICS[field], {'view': view}, value)
+
+
+def get_stats():
+    """Снимок накопленных показателей по представлениям."""
+    with _stats_lock:
+        return {view: dict(stats) for view, stats in _stats.items()}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def view_name(request):
+    """Имя представления вида TitleViewSet.list."""
+    match = request.resolver_match
+    if match is None:
+        return None
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower())
+    if action is None:
+        return view_class.__name__
+    return f'{view_class.__name__}.{action}'
+
+
+class QueryTiming:
+    """Счётчик запросов к БД для connection.execute_wrapper."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0
+        self.serializing = False
+        self.serialize_time = 0
+        self.render_started = None
+        self.render_time = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def serialize(self, to_representation, instance):
+        """Вызов to_representation с учётом времени сериализации.
+
+        Учитывается только внешний сериализатор, время запросов к БД
+        во время сериализации вычитается.
+        """
+        if self.serializing:
+            return to_representation(instance)
+        self.serializing = True
+        db_time = self.db_time
+        started = time.perf_counter()
+        try:
+            return to_representation(instance)
+        finally:
+            self.serializing = False
+            self.serialize_time += (
+                time.perf_counter() - started - (self.db_time - db_time)
+            )
+
+    def render_finished(self, response):
+        self.render_time = time.perf_counter() - self.render_started
+
+
+class QueryTimingMiddleware:
+    """Количество и время запросов к БД, время сериализации и рендеринга.
+
+    Показатели отдаются в заголовке Server-Timing и накапливаются по
+    представлениям (get_stats и счётчики view_* в /metrics). При
+    API_QUERY_TIMING = False middleware отключается при загрузке и не
+    влияет на обработку запросов.
+    """
+
+    def __init__(self, get_response):
+        if not settings.API_QUERY_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = QueryTiming()
+        request.query_timing = timing
+        token = current_timing.set(timing)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timing))
+                response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        total_time = time.perf_counter() - started
+        response['Server-Timing'] = (
+            f'db;dur={timing.db_time * 1000:.2f};'
+            f'desc="{timing.queries} queries", '
+            f'serialize;dur={timing.serialize_time * 1000:.2f}, '
+            f'render;dur={timing.render_time * 1000:.2f}, '
+            f'total;dur={total_time * 1000:.2f}'
+        )
+        name = view_name(request)
+        if name is not None:
+            record_stats(
+                name, timing.queries, timing.db_time, timing.serialize_time,
+                timing.render_time, total_time
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        timing = request.query_timing
+        timing.render_started = time.perf_counter()
+        response.add_post_render_callback(timing.render_finished)
+        return response
+
+
+class MetricsMiddleware:
+    """Метрики запросов для выдачи /metrics.
+
+    Учитываются количество запросов по представлению, методу и статусу,
+    время обработки, количество и время запросов к БД. При
+    API_METRICS = False middleware отключается при загрузке.
+    """
+
+    def __init__(self, get_response):
+        if not settings.API_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = QueryTiming()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timing))
+            response = self.get_response(request)
+        total_time = time.perf_counter() - started
+        labels = {'view': view_name(request) or 'unmatched'}
+        registry.inc('http_requests_total', {
+            **labels,
+            'method': request.method,
+            'status': response.status_code,
+        })
+        registry.observe('http_request_duration_seconds', labels, total_time)
+        registry.observe('db_queries_per_request', labels, timing.queries)
+        registry.observe('db_query_duration_seconds', labels, timing.db_time)
+        return response
+
+
+def should_log_slow_query(sql):
+    """Ограничение частоты записи одного запроса в журнал.
+
+    Запрос записывается не чаще раза в API_SLOW_QUERY_INTERVAL секунд;
+    возвращается количество пропущенных с прошлой записи повторов или
+    None, если запись сейчас не нужна.
+    """
+    now = time.monotonic()
+    with _slow_queries_lock:
+        logged_at, skipped = _slow_queries.get(sql, (None, 0))
+        if (logged_at is not None
+                and now - logged_at < settings.API_SLOW_QUERY_INTERVAL):
+            _slow_queries[sql] = (logged_at, skipped + 1)
+            _slow_queries.move_to_end(sql)
+            return None
+        _slow_queries[sql] = (now, 0)
+        _slow_queries.move_to_end(sql)
+        while len(_slow_queries) > SLOW_QUERY_MEMO_SIZE:
+            _slow_queries.popitem(last=False)
+        return skipped
+
+
+def explain(connection, sql, params):
+    """План запроса отдельным курсором, минуя execute_wrapper."""
+    prefix = (
+        'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+    )
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f'{prefix} {sql}', params)
+        return '\n'.join(
+            ' '.join(str(column) for column in row)
+            for row in cursor.fetchall()
+        )
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """Запись в журнал запросов к БД дольше API_SLOW_QUERY_MS."""
+
+    def __init__(self, request):
+        self.request = request
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            if duration >= settings.API_SLOW_QUERY_MS:
+                self.log(context['connection'], sql, params, many, duration)
+
+    def log(self, connection, sql, params, many, duration):
+        skipped = should_log_slow_query(sql)
+        if skipped is None:
+            return
+        plan = None
+        if not many and sql.lstrip()[:6].upper() == 'SELECT':
+            try:
+                plan = explain(connection, sql, params)
+            except Exception as error:
+                plan = f'не удалось получить план: {error}'
+        slow_query_logger.warning(
+            'Медленный запрос %.2f мс, представление %s, повторов %s\n'
+            '%s\nпараметры: %r%s',
+            duration, view_name(self.request) or self.request.path, skipped,
+            sql, params, f'\nплан:\n{plan}' if plan else ''
+        )
+
+
+class SlowQueryMiddleware:
+    """Журнал медленных запросов к БД с планом выполнения.
+
+    При API_SLOW_QUERY_MS = None middleware отключается при загрузке.
+    """
+
+    def __init__(self, get_response):
+        if settings.API_SLOW_QUERY_MS is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        log = SlowQueryLog(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            return self.get_response(request)
@@ -1,5 +1,18 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, F, Max
+from django.utils.cache import get_conditional_response
+from django.utils.functional import cached_property
+from django.utils.http import http_date, quote_etag
 from rest_framework import filters, mixins, viewsets
+from rest_framework.generics import get_object_or_404
 
+from reviews.models import Review, Title
+from .bitmap import BitmapList, bitmap_ids, popcount
+from .bitmap import index as bitmap_index
+from .cache import get_or_set, make_key
+from .constants import FACETS_QUERY_PARAM
 from .permissions import IsAdmin, OnlyRead
 
 
@@ -14,3 +27,220 @@ class ListDestroyCreateWithFilters(
     search_fields = ('name',)
     lookup_field = 'slug'
     permission_classes = (OnlyRead | IsAdmin,)
+
+
+class TitleNestedMixin:
+    """Произведение из URL, загружаемое один раз за запрос."""
+
+    @cached_property
+    def title(self):
+        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+
+    def get_title(self):
+        return self.title
+
+
+class ReviewNestedMixin(TitleNestedMixin):
+    """Отзыв и произведение из URL, загружаемые одним запросом."""
+
+    @cached_property
+    def review(self):
+        return get_object_or_404(
+            Review.objects.select_related('title'),
+            id=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id')
+        )
+
+    @cached_property
+    def title(self):
+        return self.review.title
+
+    def get_review_object(self):
+        return self.review
+
+
+class ConditionalGetMixin:
+    """Условные GET-запросы по ETag и Last-Modified.
+
+    Валидаторы считаются одним запросом max(updated_at)/count по тому же
+    набору объектов, что и ответ (для отзывов и комментариев — по
+    покрывающему индексу родитель + updated_at), поэтому при совпадении
+    ответ 304 отдаётся без сериализации. Для кэшируемых списков
+    валидаторы хранятся в кэше рядом с ответом. Смена имени автора
+    обновляет дату изменения его отзывов и комментариев.
+    """
+
+    updated_field = 'updated_at'
+
+    def get_validators(self, request):
+        namespace = getattr(self, 'cache_namespace', None)
+        if (namespace is not None and self.action == 'list'
+                and settings.API_RESPONSE_CACHE):
+            return get_or_set(
+                make_key(namespace, request, 'validators'),
+                lambda: self.compute_validators(request)
+            )
+        return self.compute_validators(request)
+
+    def get_validator_state(self):
+        """Дата последнего изменения и число объектов ответа."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        return queryset.order_by().aggregate(
+            last_modified=Max(self.updated_field), count=Count('pk')
+        )
+
+    def compute_validators(self, request):
+        state = self.get_validator_state()
+        last_modified = state['last_modified']
+        etag = hashlib.md5(
+            f'{request.get_full_path()}:{last_modified}:{state["count"]}:'
+            f'{state.get("digest", "")}'.encode()
+        ).hexdigest()
+        return quote_etag(etag), last_modified, state['count']
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified, count = self.get_validators(request)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if not count and lookup_url_kwarg in self.kwargs:
+            # объекта нет: ответ 404 без валидаторов
+            return handler(request, *args, **kwargs)
+        timestamp = last_modified and int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class FacetMixin:
+    """Счётчики значений фильтров (фасеты) для текущей выборки списка.
+
+    При ?facets=true к постраничному ответу добавляется поле facets:
+    количество объектов по значениям полей facet_fields и по интервалам
+    значений facet_buckets. Каждый фасет считается одним запросом с
+    группировкой.
+    """
+
+    facet_fields = {}
+    facet_buckets = {}
+
+    def facets_requested(self):
+        return self.request.query_params.get(
+            FACETS_QUERY_PARAM, ''
+        ).lower() in ('1', 'true')
+
+    def get_facets(self, queryset):
+        queryset = queryset.model.objects.filter(
+            pk__in=queryset.order_by().values('pk')
+        )
+        facets = {}
+        for name, lookup in self.facet_fields.items():
+            facets[name] = dict(
+                queryset.filter(**{f'{lookup}__isnull': False})
+                .values_list(lookup)
+                .annotate(count=Count('pk', distinct=True))
+                .order_by(lookup)
+            )
+        for name, (field, size) in self.facet_buckets.items():
+            facets[name] = {
+                f'{bucket}-{bucket + size - 1}': count
+                for bucket, count in queryset
+                .annotate(bucket=F(field) / size * size)
+                .values_list('bucket')
+                .annotate(count=Count('pk'))
+                .order_by('bucket')
+            }
+        return facets
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.facets_requested():
+            response.data['facets'] = self.get_facets(
+                self.filter_queryset(self.get_queryset())
+            )
+        return response
+
+
+class BitmapFilterMixin:
+    """Фильтрация списка по битовым картам вместо запросов с JOIN.
+
+    Используется при API_BITMAP_INDEX = True, если в запросе нет других
+    параметров, кроме bitmap_params и номера страницы; иначе список
+    фильтруется обычным образом. Должен стоять в базовых классах перед
+    ConditionalGetMixin, чтобы валидаторы тоже считались по картам.
+    """
+
+    bitmap_params = ('genre', 'category', 'year')
+
+    def get_bitmap_filters(self):
+        if not settings.API_BITMAP_INDEX:
+            return None
+        params = self.request.query_params
+        allowed = {*self.bitmap_params, self.paginator.page_query_param}
+        if not set(params) <= allowed:
+            return None
+        filters = {
+            name: params[name] for name in self.bitmap_params
+            if name in params
+        }
+        if 'year' in filters:
+            try:
+                filters['year'] = int(filters['year'])
+            except ValueError:
+                return None
+        return filters
+
+    def get_validator_state(self):
+        """Валидаторы списка по битовой карте без запроса с JOIN.
+
+        Состав выборки задаётся хэшем карты, дата изменения — одним
+        запросом по первичному ключу к произведениям текущей страницы.
+        """
+        filters = self.get_bitmap_filters() if self.action == 'list' else None
+        if filters is None:
+            return super().get_validator_state()
+        page = self.request.query_params.get(
+            self.paginator.page_query_param, '1'
+        )
+        if not page.isdigit() or int(page) < 1:
+            return super().get_validator_state()
+        bitmap_index.ensure_built()
+        bitmap = bitmap_index.resolve(filters)
+        page_size = self.paginator.get_page_size(self.request)
+        ids = bitmap_ids(
+            bitmap, (int(page) - 1) * page_size, int(page) * page_size
+        )
+        state = self.get_queryset().filter(pk__in=ids).order_by().aggregate(
+            last_modified=Max(self.updated_field)
+        )
+        state.update(
+            count=popcount(bitmap),
+            digest=hashlib.md5(
+                bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+            ).hexdigest()
+        )
+        return state
+
+    def paginate_queryset(self, queryset):
+        filters = self.get_bitmap_filters()
+        if filters is None:
+            return super().paginate_queryset(queryset)
+        bitmap_index.ensure_built()
+        return super().paginate_queryset(
+            BitmapList(self.get_queryset(), bitmap_index.resolve(filters))
+        )
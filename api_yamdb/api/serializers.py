@@ -9,9 +9,24 @@ from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
 from reviews.validators import validate_username, validate_year
 from api.constants import (EMAIL_MAX_LENGTH, ERROR_REVIEW_AUTHOR_UNIQUE,
                            USERNAME_MAX_LENGTH)
+from api.middleware import current_timing
 
 
-class ReviewSerializer(ModelSerializer):
+class TimedSerializerMixin:
+    """Учёт времени сериализации в заголовке Server-Timing.
+
+    Время считается, только пока запрос проходит через
+    QueryTimingMiddleware.
+    """
+
+    def to_representation(self, instance):
+        timing = current_timing.get()
+        if timing is None:
+            return super().to_representation(instance)
+        return timing.serialize(super().to_representation, instance)
+
+
+class ReviewSerializer(TimedSerializerMixin, ModelSerializer):
     author = SlugRelatedField(
         read_only=True,
         slug_field='username'
@@ -28,13 +43,19 @@ class ReviewSerializer(ModelSerializer):
         if (self.context.get('request').method == 'POST'
                 and Review.objects.filter(
                     author=self.context.get('request').user,
-                    title=self.context.get('view').kwargs.get('title_id'))
+                    title=self.context.get('view').get_title())
                 .exists()):
             raise ValidationError(ERROR_REVIEW_AUTHOR_UNIQUE)
         return data
 
 
-class CommentSerializer(ModelSerializer):
+class ReviewSearchSerializer(ReviewSerializer):
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('title',)
+
+
+class CommentSerializer(TimedSerializerMixin, ModelSerializer):
     author = SlugRelatedField(
         read_only=True,
         slug_field='username'
@@ -45,7 +66,7 @@ class CommentSerializer(ModelSerializer):
         fields = ('id', 'text', 'author', 'pub_date',)
 
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для Юзера"""
     username = serializers.CharField(
         required=True,
@@ -72,7 +93,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
         ]
 
 
-class SignUpSerializer(serializers.Serializer):
+class SignUpSerializer(TimedSerializerMixin, serializers.Serializer):
     """Сериализатор отправки письма."""
 
     email = serializers.EmailField(max_length=EMAIL_MAX_LENGTH, required=True)
@@ -125,7 +146,7 @@ class TokenSerializer(serializers.Serializer):
         fields = ('username', 'confirmation_code',)
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор категорий."""
 
     class Meta:
@@ -136,7 +157,7 @@ class CategorySerializer(serializers.ModelSerializer):
         )
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор жанров."""
 
     class Meta:
@@ -147,7 +168,7 @@ class GenreSerializer(serializers.ModelSerializer):
         )
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор произведений."""
 
     genre = GenreSerializer(many=True)
@@ -156,7 +177,24 @@ class TitleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id',
+            'name',
+            'year',
+            'rating',
+            'description',
+            'genre',
+            'category',
+        )
+
+
+class ScoredTitleSerializer(TitleSerializer):
+    """Произведение со значением показателя (лидерборды, похожие)."""
+
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(TitleSerializer.Meta):
+        fields = TitleSerializer.Meta.fields + ('score',)
 
 
 class TitleCreateAndUpdateSerializer(serializers.ModelSerializer):
@@ -172,7 +210,7 @@ class TitleCreateAndUpdateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category')
 
     def to_representation(self, value):
         return TitleSerializer(value).data
@@ -0,0 +1,264 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+
+from reviews.models import (Category, CustomUser, Genre, GenreTitle, Review,
+                            Title)
+from .authentication import (REVOKE_FIELDS, forget_token_version,
+                             revoke_tokens, revoke_values, users)
+from .autocomplete import CATEGORIES, GENRES, TITLES, index
+from .bitmap import index as bitmap_index
+from .cache import invalidate
+from .constants import CACHE_CATEGORIES, CACHE_GENRES, CACHE_TITLES
+
+INVALIDATED_NAMESPACES = {
+    Category: (CACHE_CATEGORIES, CACHE_TITLES),
+    Genre: (CACHE_GENRES, CACHE_TITLES),
+    Title: (CACHE_TITLES,),
+    GenreTitle: (CACHE_TITLES,),
+    Review: (CACHE_TITLES,),
+}
+
+
+def invalidate_on_commit(sender, **kwargs):
+    """Сброс кэша списков после фиксации транзакции."""
+    transaction.on_commit(
+        partial(invalidate, *INVALIDATED_NAMESPACES[sender])
+    )
+
+
+for model in INVALIDATED_NAMESPACES:
+    post_save.connect(
+        invalidate_on_commit, sender=model,
+        dispatch_uid=f'api_cache_save_{model.__name__}'
+    )
+    post_delete.connect(
+        invalidate_on_commit, sender=model,
+        dispatch_uid=f'api_cache_delete_{model.__name__}'
+    )
+
+
+def invalidate_on_genre_change(sender, **kwargs):
+    invalidate_on_commit(GenreTitle)
+
+
+m2m_changed.connect(
+    invalidate_on_genre_change, sender=Title.genre.through,
+    dispatch_uid='api_cache_title_genre'
+)
+
+
+AUTOCOMPLETE_KINDS = {
+    Title: TITLES,
+    Genre: GENRES,
+    Category: CATEGORIES,
+}
+
+
+def refresh_autocomplete(sender, instance, **kwargs):
+    """Обновление подсказок после фиксации транзакции."""
+    if sender is Review:
+        kind, pk = TITLES, instance.title_id
+    else:
+        kind, pk = AUTOCOMPLETE_KINDS[sender], instance.pk
+    transaction.on_commit(partial(index.refresh, kind, pk))
+
+
+for model in (*AUTOCOMPLETE_KINDS, Review):
+    post_save.connect(
+        refresh_autocomplete, sender=model,
+        dispatch_uid=f'api_autocomplete_save_{model.__name__}'
+    )
+    post_delete.connect(
+        refresh_autocomplete, sender=model,
+        dispatch_uid=f'api_autocomplete_delete_{model.__name__}'
+    )
+
+
+def remember_title_category(sender, instance, **kwargs):
+    """Категория произведения до изменения (для подсказок)."""
+    instance._previous_category_id = None
+    if instance.pk is not None and index.is_built():
+        instance._previous_category_id = Title.objects.filter(
+            pk=instance.pk
+        ).values_list('category_id', flat=True).first()
+
+
+def remember_title_groups(sender, instance, **kwargs):
+    """Категория и жанры удаляемого произведения (для подсказок)."""
+    instance._previous_category_id = instance.category_id
+    instance._previous_genre_ids = ()
+    if index.is_built():
+        instance._previous_genre_ids = tuple(
+            instance.genre.values_list('pk', flat=True)
+        )
+
+
+def refresh_autocomplete_groups(sender, instance, **kwargs):
+    """Обновление числа произведений у категорий и жанров в подсказках."""
+    previous = getattr(instance, '_previous_category_id', None)
+    categories = {
+        pk for pk in (previous, instance.category_id) if pk is not None
+    }
+    if categories and (
+        previous != instance.category_id or kwargs.get('created', True)
+    ):
+        transaction.on_commit(
+            partial(index.refresh, CATEGORIES, *categories)
+        )
+    genres = getattr(instance, '_previous_genre_ids', ())
+    if genres:
+        transaction.on_commit(partial(index.refresh, GENRES, *genres))
+
+
+def refresh_autocomplete_genres(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    """Обновление числа произведений у жанров при изменении связей."""
+    if action == 'pre_clear' and not reverse:
+        instance._cleared_genre_ids = tuple(
+            instance.genre.values_list('pk', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        pks = (instance.pk,)
+    elif action == 'post_clear':
+        pks = getattr(instance, '_cleared_genre_ids', ())
+    else:
+        pks = tuple(pk_set)
+    if pks:
+        transaction.on_commit(partial(index.refresh, GENRES, *pks))
+
+
+pre_save.connect(
+    remember_title_category, sender=Title,
+    dispatch_uid='api_autocomplete_remember_title'
+)
+pre_delete.connect(
+    remember_title_groups, sender=Title,
+    dispatch_uid='api_autocomplete_remember_deleted_title'
+)
+post_save.connect(
+    refresh_autocomplete_groups, sender=Title,
+    dispatch_uid='api_autocomplete_title_category'
+)
+post_delete.connect(
+    refresh_autocomplete_groups, sender=Title,
+    dispatch_uid='api_autocomplete_title_groups'
+)
+m2m_changed.connect(
+    refresh_autocomplete_genres, sender=Title.genre.through,
+    dispatch_uid='api_autocomplete_title_genre'
+)
+
+
+def refresh_bitmap_title(sender, instance, **kwargs):
+    transaction.on_commit(partial(bitmap_index.refresh, instance.pk))
+
+
+def refresh_bitmap_genres(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        pks = (instance.pk,)
+    elif pk_set:
+        pks = tuple(pk_set)
+    else:
+        transaction.on_commit(bitmap_index.invalidate)
+        return
+    transaction.on_commit(partial(bitmap_index.refresh, *pks))
+
+
+def refresh_genre_link(sender, instance, **kwargs):
+    """Обновление индексов при прямом изменении связи с жанром.
+
+    Связи, изменённые через title.genre, обрабатываются по m2m_changed;
+    строки GenreTitle, сохранённые напрямую (например, в админке), —
+    здесь.
+    """
+    previous = getattr(instance, '_previous_link', None) or (None, None)
+    titles = {instance.title_id, previous[0]} - {None}
+    genres = {instance.genre_id, previous[1]} - {None}
+    transaction.on_commit(partial(bitmap_index.refresh, *titles))
+    transaction.on_commit(partial(index.refresh, GENRES, *genres))
+
+
+def invalidate_bitmap(sender, **kwargs):
+    transaction.on_commit(bitmap_index.invalidate)
+
+
+post_save.connect(
+    refresh_bitmap_title, sender=Title, dispatch_uid='api_bitmap_save_title'
+)
+post_delete.connect(
+    refresh_bitmap_title, sender=Title,
+    dispatch_uid='api_bitmap_delete_title'
+)
+m2m_changed.connect(
+    refresh_bitmap_genres, sender=Title.genre.through,
+    dispatch_uid='api_bitmap_title_genre'
+)
+post_save.connect(
+    refresh_genre_link, sender=GenreTitle,
+    dispatch_uid='api_index_save_genre_title'
+)
+post_delete.connect(
+    refresh_genre_link, sender=GenreTitle,
+    dispatch_uid='api_index_delete_genre_title'
+)
+for model in (Category, Genre):
+    post_save.connect(
+        invalidate_bitmap, sender=model,
+        dispatch_uid=f'api_bitmap_save_{model.__name__}'
+    )
+    post_delete.connect(
+        invalidate_bitmap, sender=model,
+        dispatch_uid=f'api_bitmap_delete_{model.__name__}'
+    )
+
+
+def forget_user(sender, instance, **kwargs):
+    """Сброс кэша аутентификации сразу и после фиксации транзакции."""
+    users.pop(instance.pk)
+    forget_token_version(instance.pk)
+    transaction.on_commit(partial(users.pop, instance.pk))
+    transaction.on_commit(partial(forget_token_version, instance.pk))
+
+
+def remember_revoke_values(sender, instance, update_fields=None, **kwargs):
+    instance._revoke_values = None
+    if instance.pk is None or (
+        update_fields is not None
+        and not set(update_fields) & set(REVOKE_FIELDS)
+    ):
+        return
+    instance._revoke_values = CustomUser.objects.filter(
+        pk=instance.pk
+    ).values_list(*REVOKE_FIELDS).first()
+
+
+def revoke_changed_tokens(sender, instance, created, **kwargs):
+    """Отзыв токенов при деактивации, смене имени или роли."""
+    previous = getattr(instance, '_revoke_values', None)
+    if previous is not None and previous != revoke_values(instance):
+        revoke_tokens(instance)
+
+
+pre_save.connect(
+    remember_revoke_values, sender=CustomUser,
+    dispatch_uid='api_auth_remember_user'
+)
+post_save.connect(
+    revoke_changed_tokens, sender=CustomUser,
+    dispatch_uid='api_auth_revoke_user'
+)
+post_save.connect(
+    forget_user, sender=CustomUser, dispatch_uid='api_auth_save_user'
+)
+post_delete.connect(
+    forget_user, sender=CustomUser, dispatch_uid='api_auth_delete_user'
+)
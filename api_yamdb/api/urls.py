@@ -3,7 +3,8 @@ from rest_framework.routers import SimpleRouter
 
 from .constants import URL_COMMENTS, URL_REVIEW
 from .views import (CategoryViewSet, CommentViewSet, CustomUserViewSet,
-                    GenreViewSet, ReviewViewSet, TitleViewSet, get_token,
+                    GenreViewSet, LeaderboardViewSet, ReviewSearchViewSet,
+                    ReviewViewSet, TitleViewSet, autocomplete, get_token,
                     sign_up)
 
 router = SimpleRouter()
@@ -12,8 +13,12 @@ router.register(r'users', CustomUserViewSet, basename='users')
 router.register(r'categories', CategoryViewSet, basename='categories')
 router.register(r'genres', GenreViewSet, basename='genres')
 router.register(r'titles', TitleViewSet, basename='titles')
+router.register(
+    r'leaderboards', LeaderboardViewSet, basename='leaderboards'
+)
 router.register(URL_COMMENTS, CommentViewSet, basename='comment')
 router.register(URL_REVIEW, ReviewViewSet, basename='review')
+router.register(r'reviews', ReviewSearchViewSet, basename='reviews-search')
 
 auth_patterns = [
     path('signup/', sign_up, name='sign_up'),
@@ -23,4 +28,5 @@ auth_patterns = [
 urlpatterns = [
     path('v1/', include(router.urls)),
     path('v1/auth/', include(auth_patterns)),
+    path('v1/autocomplete/', autocomplete, name='autocomplete'),
 ]
@@ -1,93 +1,191 @@
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, status, viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework import filters, mixins, status, viewsets
+from rest_framework.decorators import (action, api_view,
+                                       authentication_classes,
+                                       permission_classes)
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import (IsAuthenticated,
+from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from rest_framework_simplejwt.tokens import AccessToken
 
-from reviews.models import Category, CustomUser, Genre, Review, Title
+from reviews.models import (Category, CustomUser, Genre, GenreTitle, Review,
+                            Title)
+from reviews.outbox import enqueue
 from api.serializers import (CategorySerializer, CommentSerializer,
                              CustomUserSerializer, GenreSerializer,
-                             ReviewSerializer, SignUpSerializer,
-                             TitleCreateAndUpdateSerializer, TitleSerializer,
-                             TokenSerializer)
-from api_yamdb.settings import ADMIN_EMAIL
+                             ReviewSearchSerializer, ReviewSerializer,
+                             ScoredTitleSerializer, SignUpSerializer,
+                             TitleCreateAndUpdateSerializer,
+                             TitleSerializer, TokenSerializer)
 
 
-from .filters import TitleFilter
-from .mixins import ListDestroyCreateWithFilters
+from .authentication import RoleAccessToken
+from .autocomplete import index
+from .cache import CachedListMixin
+from .constants import (AUTOCOMPLETE_LIMIT, AUTOCOMPLETE_MAX_LIMIT,
+                        CACHE_CATEGORIES, CACHE_GENRES, CACHE_TITLES,
+                        FACET_YEAR_BUCKET, LEADERBOARD_LIMIT,
+                        LEADERBOARD_MAX_LIMIT, RECOMMENDATIONS_LIMIT,
+                        SIMILAR_TITLES_LIMIT)
+from .filters import (FullTextSearchFilter, RankingOrderingFilter,
+                      TitleFilter)
+from .metrics import registry, render
+from .mixins import (BitmapFilterMixin, ConditionalGetMixin, FacetMixin,
+                     ListDestroyCreateWithFilters, ReviewNestedMixin,
+                     TitleNestedMixin)
+from .pagination import PageNumberOrCursorPagination
 from .permissions import IsAdmin, IsOwner, OnlyRead
 
 
-class CategoryViewSet(ListDestroyCreateWithFilters):
+class CategoryViewSet(CachedListMixin, ListDestroyCreateWithFilters):
     """Представление категорий."""
 
+    cache_namespace = CACHE_CATEGORIES
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
 
-class GenreViewSet(ListDestroyCreateWithFilters):
+class GenreViewSet(CachedListMixin, ListDestroyCreateWithFilters):
     """Представление жанров."""
 
+    cache_namespace = CACHE_GENRES
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(BitmapFilterMixin, ConditionalGetMixin, CachedListMixin,
+                   FacetMixin, viewsets.ModelViewSet):
     """Представление произведений."""
 
-    queryset = Title.objects.all().annotate(rating=Avg(
-        'reviews__score'
-    )).select_related('category').prefetch_related('genre')
+    cache_namespace = CACHE_TITLES
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     serializer_class = TitleSerializer
-    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
+    filter_backends = (
+        DjangoFilterBackend, FullTextSearchFilter, RankingOrderingFilter
+    )
     permission_classes = (OnlyRead | IsAdmin,)
     filterset_fields = ('name', 'year', 'category__slug', 'genre__slug',)
-    ordering_fields = ('name', 'year')
+    ordering_fields = ('name', 'year', 'rating')
     filterset_class = TitleFilter
+    facet_fields = {'genre': 'genre__slug', 'category': 'category__slug'}
+    facet_buckets = {'year': ('year', FACET_YEAR_BUCKET)}
 
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH'):
             return TitleCreateAndUpdateSerializer
         return TitleSerializer
 
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """Похожие произведения из таблицы, заполняемой rebuild_similar."""
+        limit = get_limit(
+            request, SIMILAR_TITLES_LIMIT, settings.SIMILAR_TITLES_COUNT
+        )
+        if not pk.isdigit():
+            raise Http404
+        titles = list(self.get_queryset().filter(
+            similar_to__title_id=pk
+        ).annotate(score=F('similar_to__score')).order_by('-score')[:limit])
+        if not titles and not Title.objects.filter(pk=pk).exists():
+            raise Http404
+        return Response(ScoredTitleSerializer(titles, many=True).data)
+
+
+def ranked(queryset, field):
+    """Сортировка произведений по показателю из таблицы рейтингов."""
+    return queryset.annotate(score=F(f'ranking__{field}')).order_by(
+        '-score', '-pk'
+    )
+
+
+class LeaderboardViewSet(viewsets.GenericViewSet):
+    """Лидерборды по таблице предрассчитанных рейтингов.
+
+    Поддерживаются фильтры списка произведений (genre, category, year)
+    и параметр limit.
+    """
+
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
+    serializer_class = ScoredTitleSerializer
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = TitleFilter
+    permission_classes = (OnlyRead,)
 
-class ReviewViewSet(ModelViewSet):
+    def leaderboard(self, request, field, **filters):
+        limit = get_limit(request, LEADERBOARD_LIMIT, LEADERBOARD_MAX_LIMIT)
+        queryset = ranked(
+            self.filter_queryset(self.get_queryset()).filter(**filters), field
+        )
+        return Response(
+            self.get_serializer(queryset[:limit], many=True).data
+        )
+
+    @action(detail=False)
+    def top(self, request):
+        """Лучшие по взвешенному рейтингу среди произведений с отзывами."""
+        return self.leaderboard(
+            request, 'bayesian_rating', rating_count__gt=0
+        )
+
+    @action(detail=False)
+    def trending(self, request):
+        """Произведения с наибольшим числом свежих отзывов."""
+        return self.leaderboard(
+            request, 'trending_score', ranking__trending_score__gt=0
+        )
+
+
+class ReviewViewSet(ConditionalGetMixin, TitleNestedMixin, ModelViewSet):
     """Представление отзывов."""
     serializer_class = ReviewSerializer
     permission_classes = (IsAuthenticatedOrReadOnly, IsOwner,)
-
-    def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+    pagination_class = PageNumberOrCursorPagination
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.title.reviews.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(author=self.request.user, title=self.title)
+
+
+class ReviewSearchViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Поиск отзывов по тексту во всех произведениях."""
+
+    queryset = Review.objects.select_related('author')
+    serializer_class = ReviewSearchSerializer
+    filter_backends = (FullTextSearchFilter,)
 
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get(FullTextSearchFilter.search_param):
+            raise ValidationError(
+                {FullTextSearchFilter.search_param: 'Обязательный параметр'}
+            )
+        return super().list(request, *args, **kwargs)
 
-class CommentViewSet(ModelViewSet):
+
+class CommentViewSet(ConditionalGetMixin, ReviewNestedMixin, ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (IsAuthenticatedOrReadOnly, IsOwner,)
-
-    def get_review_object(self):
-        return get_object_or_404(Review, id=self.kwargs.get('review_id'))
+    pagination_class = PageNumberOrCursorPagination
 
     def get_queryset(self):
-        return self.get_review_object().comments.all()
+        return self.review.comments.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user,
-                        review=self.get_review_object())
+        serializer.save(author=self.request.user, review=self.review)
 
 
 class CustomUserViewSet(viewsets.ModelViewSet):
@@ -109,7 +207,7 @@ class CustomUserViewSet(viewsets.ModelViewSet):
     )
     def me(self, request):
         """Функция для эндпоинта 'users/me"""
-        user = get_object_or_404(CustomUser, username=request.user.username)
+        user = get_object_or_404(CustomUser, pk=request.user.pk)
         if request.method == 'GET':
             serializer = CustomUserSerializer(user)
         if request.method == 'PATCH':
@@ -117,9 +215,43 @@ class CustomUserViewSet(viewsets.ModelViewSet):
                                               data=request.data,
                                               partial=True)
             serializer.is_valid(raise_exception=True)
-            serializer.save(role=self.request.user.role)
+            serializer.save(role=user.role)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(
+        detail=False,
+        url_path='me/recommendations',
+        permission_classes=(IsAuthenticated,)
+    )
+    def recommendations(self, request):
+        """Персональные рекомендации.
+
+        Пока рекомендации не рассчитаны, отдаются лучшие произведения
+        в жанрах, которые пользователь оценивал, или в целом по каталогу.
+        """
+        limit = get_limit(
+            request, RECOMMENDATIONS_LIMIT, settings.RECOMMENDATIONS_COUNT
+        )
+        titles = Title.objects.select_related(
+            'category'
+        ).prefetch_related('genre')
+        result = list(titles.filter(
+            recommendations__user=request.user
+        ).annotate(
+            score=F('recommendations__score')
+        ).order_by('-score')[:limit])
+        if not result:
+            reviewed = Review.objects.filter(author=request.user)
+            top = ranked(
+                titles.filter(rating_count__gt=0).exclude(
+                    pk__in=reviewed.values('title')
+                ), 'bayesian_rating'
+            )
+            result = list(top.filter(pk__in=GenreTitle.objects.filter(
+                genre__titles__reviews__in=reviewed
+            ).values('title'))[:limit]) or list(top[:limit])
+        return Response(ScoredTitleSerializer(result, many=True).data)
+
 
 @api_view(['POST'])
 def sign_up(request):
@@ -127,15 +259,11 @@ def sign_up(request):
     serializer.is_valid(raise_exception=True)
     serializer.save()
     user = get_object_or_404(CustomUser, username=request.data.get('username'))
-    user.confirmation_code = default_token_generator.make_token(user)
-    user.save()
-    send_mail(
-        'Регистрация',
-        f'Ваш код для регистрации: {default_token_generator.make_token(user)}',
-        from_email=ADMIN_EMAIL,
-        recipient_list=(user.email,),
-        fail_silently=False
-    )
+    code = default_token_generator.make_token(user)
+    with transaction.atomic():
+        user.confirmation_code = code
+        user.save(update_fields=('confirmation_code',))
+        enqueue(user.email, 'Регистрация', f'Ваш код для регистрации: {code}')
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -148,7 +276,45 @@ def get_token(request):
     code = serializer.validated_data['confirmation_code']
     user = get_object_or_404(CustomUser, username=username)
     if default_token_generator.check_token(user, code):
-        token = str(AccessToken.for_user(user))
+        token = str(RoleAccessToken.for_user(user))
         return Response({'token': token}, status=status.HTTP_201_CREATED)
     return Response('Введен некорректный код доступа',
                     status=status.HTTP_400_BAD_REQUEST)
+
+
+def get_limit(request, default, maximum):
+    """Параметр limit: положительное число не больше maximum."""
+    limit = request.query_params.get('limit', str(default))
+    if not limit.isdigit() or int(limit) < 1:
+        raise ValidationError({'limit': 'Ожидается положительное число'})
+    return min(int(limit), maximum)
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def autocomplete(request):
+    """Подсказки по началу слов в названиях без запросов к БД."""
+    kinds = request.query_params.get('type')
+    kinds = kinds.split(',') if kinds else list(index.keys)
+    unknown = set(kinds) - set(index.keys)
+    if unknown:
+        raise ValidationError(
+            {'type': f'Неизвестный тип: {", ".join(sorted(unknown))}'}
+        )
+    limit = get_limit(request, AUTOCOMPLETE_LIMIT, AUTOCOMPLETE_MAX_LIMIT)
+    index.ensure_built()
+    prefix = request.query_params.get('q', '')
+    return Response(
+        {kind: index.search(kind, prefix, limit) for kind in kinds}
+    )
+
+
+def metrics(request):
+    """Метрики всех процессов в текстовом формате Prometheus."""
+    if not settings.API_METRICS:
+        raise Http404
+    return HttpResponse(
+        render(registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
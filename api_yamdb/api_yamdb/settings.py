@@ -36,6 +36,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.QueryTimingMiddleware',
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.SlowQueryMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -70,6 +73,32 @@ DATABASES = {
 }
 
 
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+API_CACHE_ALIAS = 'default'
+
+API_CACHE_TIMEOUT = 60 * 5
+
+# Кэширование ответов списков (CachedListMixin); команда benchmark
+# отключает его, чтобы замерять представления, а не чтение из кэша.
+API_RESPONSE_CACHE = True
+
+# Индекс подсказок перестраивается целиком не реже раза в интервал (с),
+# чтобы учесть изменения, сделанные другими процессами.
+API_AUTOCOMPLETE_MAX_AGE = 60
+
+# Фильтрация списка произведений по битовым картам в памяти процесса.
+API_BITMAP_INDEX = False
+
+API_BITMAP_INDEX_MAX_AGE = 60
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -114,7 +143,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.'
                                 'PageNumberPagination',
@@ -126,12 +155,107 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Кэш проверенных токенов и пользователей в памяти процесса
+# (api.authentication.CachedJWTAuthentication).
+AUTH_TOKEN_CACHE_SIZE = 10000
+
+AUTH_USER_CACHE_SIZE = 10000
+
+AUTH_CACHE_TTL = 60
+
+# Версия токенов кэшируется в API_CACHE_ALIAS на этот срок (с). С кэшем
+# в памяти процесса другие процессы принимают отозванный токен не дольше
+# этого срока; с общим кэшем (Redis, Memcached) отзыв виден сразу.
+AUTH_TOKEN_VERSION_TTL = 5
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 ADMIN_EMAIL = 'admin@yamdb.com'
 
+# Письма ставятся в очередь (OutboxEmail) и отправляются командой
+# send_emails пакетами; неудачные попытки повторяются с удвоением паузы.
+EMAIL_OUTBOX_BATCH_SIZE = 100
+
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+EMAIL_OUTBOX_RETRY_DELAY = timedelta(minutes=1)
+
+EMAIL_OUTBOX_LEASE = timedelta(minutes=5)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+
+# Rankings
+
+# Число «виртуальных» оценок со средним значением по каталогу во
+# взвешенном рейтинге: чем меньше отзывов, тем ближе рейтинг к среднему.
+RANKING_PRIOR_REVIEWS = 10
+
+RANKING_TRENDING_WINDOW = timedelta(days=7)
+
+RANKING_TRENDING_HALF_LIFE = timedelta(days=2)
+
+# Срок кэширования средней оценки каталога (с), по которой взвешенный
+# рейтинг пересчитывается при записи отзыва; rebuild_rankings обновляет её.
+RANKING_MEAN_TIMEOUT = 60 * 10
+
+# Recommendations
+
+# Число похожих произведений, сохраняемых командой rebuild_similar.
+SIMILAR_TITLES_COUNT = 20
+
+# Число персональных рекомендаций и параметры матричного разложения
+# (команда rebuild_recommendations).
+RECOMMENDATIONS_COUNT = 20
+
+RECOMMENDATION_FACTORS = 10
+
+RECOMMENDATION_ITERATIONS = 5
+
+RECOMMENDATION_REGULARIZATION = 0.1
+
+# Diagnostics
+
+API_QUERY_TIMING = False
+
+# Выдача /metrics без аутентификации и MetricsMiddleware: включать
+# (API_METRICS=true в окружении), только если эндпоинт закрыт от внешнего
+# доступа на уровне сети или прокси.
+API_METRICS = os.environ.get('API_METRICS', '').lower() in ('1', 'true')
+
+# Каталог для файлов метрик процессов при запуске нескольких воркеров
+# WSGI-сервера. Файлы завершившихся воркеров остаются и учитываются в
+# суммах, поэтому перед запуском сервера каталог нужно очищать.
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+
+# Порог медленного запроса к БД в мс; None отключает журнал.
+API_SLOW_QUERY_MS = None
+
+# Один и тот же запрос пишется в журнал не чаще раза в интервал (с).
+API_SLOW_QUERY_INTERVAL = 60
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'slow_queries.log',
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 3,
+            'encoding': 'utf8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'api.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 # PERMISSION = permission_classes([AllowAny])
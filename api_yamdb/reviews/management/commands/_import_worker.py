@@ -0,0 +1,13 @@
+import django
+
+
+def init_worker(lock):
+    """Инициализатор процесса импорта.
+
+    Модуль не импортирует модели, поэтому при запуске процессов методом
+    spawn Django настраивается до получения первой задачи.
+    """
+    django.setup()
+    from reviews.management.commands import import_data
+
+    import_data.import_lock = lock
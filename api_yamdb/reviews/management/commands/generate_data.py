@@ -0,0 +1,189 @@
+import csv
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from math import gcd
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.management.commands.import_data import DICT
+from reviews.models import (ADMIN, MODERATOR, USER, Category, Comment,
+                            CustomUser, Genre, GenreTitle, Review, Title)
+
+GENERATED_PATH = 'generated_data/'
+START_DATE = datetime(2000, 1, 1, tzinfo=timezone.utc)
+DATE_RANGE = timedelta(days=365 * 20)
+ROLES = (USER,) * 97 + (MODERATOR,) * 2 + (ADMIN,)
+MAX_GENRES_PER_TITLE = 3
+YEARS = (1900, 2020)
+FIELDS = {
+    CustomUser: (
+        'id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'
+    ),
+    Genre: ('id', 'name', 'slug'),
+    Category: ('id', 'name', 'slug'),
+    Title: ('id', 'name', 'year', 'category'),
+    Review: ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    Comment: ('id', 'review_id', 'text', 'author', 'pub_date'),
+    GenreTitle: ('id', 'title_id', 'genre_id'),
+}
+
+
+def zipf_counts(total, size, skew, limit):
+    """Распределение total объектов по size позициям по закону Ципфа.
+
+    Позиция i получает долю, пропорциональную 1 / (i + 1) ** skew, но не
+    больше limit объектов.
+    """
+    weights = [1 / (rank + 1) ** skew for rank in range(size)]
+    weights_sum = sum(weights)
+    counts = [min(limit, int(total * weight / weights_sum))
+              for weight in weights]
+    remainder = min(total, size * limit) - sum(counts)
+    rank = 0
+    while remainder > 0:
+        if counts[rank] < limit:
+            counts[rank] += 1
+            remainder -= 1
+        rank = (rank + 1) % size
+    return counts
+
+
+def distinct_authors(rng, users, count):
+    """count различных id авторов из 1..users без хранения множества."""
+    start = rng.randrange(users)
+    step = rng.randrange(1, users) if users > 1 else 1
+    while gcd(step, users) != 1:
+        step += 1
+    return ((start + index * step) % users + 1 for index in range(count))
+
+
+def random_date(rng):
+    return (
+        START_DATE + timedelta(seconds=rng.randrange(
+            int(DATE_RANGE.total_seconds())
+        ))
+    ).isoformat().replace('+00:00', 'Z')
+
+
+def skewed_id(rng, size, skew):
+    """Случайный id из 1..size, смещённый к меньшим значениям."""
+    return int(size * rng.random() ** (1 + skew)) + 1
+
+
+class Command(BaseCommand):
+    help = 'генерация синтетических данных в формате .csv для import_data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=GENERATED_PATH,
+                            help='каталог для CSV-файлов')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument('--categories', type=int, default=5)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=30000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='показатель распределения популярности произведений'
+        )
+
+    def users(self, rng, options):
+        for user_id in range(1, options['users'] + 1):
+            yield (
+                user_id, f'user{user_id}', f'user{user_id}@yamdb.fake',
+                rng.choice(ROLES), '', f'Имя{user_id}', f'Фамилия{user_id}'
+            )
+
+    def genres(self, rng, options):
+        for genre_id in range(1, options['genres'] + 1):
+            yield genre_id, f'Жанр {genre_id}', f'genre-{genre_id}'
+
+    def categories(self, rng, options):
+        for category_id in range(1, options['categories'] + 1):
+            yield category_id, f'Категория {category_id}', (
+                f'category-{category_id}'
+            )
+
+    def titles(self, rng, options):
+        for title_id in range(1, options['titles'] + 1):
+            yield (
+                title_id, f'Произведение {title_id}',
+                rng.randint(*YEARS),
+                rng.randint(1, options['categories'])
+            )
+
+    def genre_titles(self, rng, options):
+        row_id = 0
+        for title_id in range(1, options['titles'] + 1):
+            count = rng.randint(
+                1, min(MAX_GENRES_PER_TITLE, options['genres'])
+            )
+            for genre_id in rng.sample(range(1, options['genres'] + 1),
+                                       count):
+                row_id += 1
+                yield row_id, title_id, genre_id
+
+    def reviews(self, rng, options):
+        review_id = 0
+        counts = zipf_counts(
+            options['reviews'], options['titles'], options['skew'],
+            options['users']
+        )
+        for title_id, count in enumerate(counts, 1):
+            for author in distinct_authors(rng, options['users'], count):
+                review_id += 1
+                yield (
+                    review_id, title_id, f'Отзыв {review_id}', author,
+                    rng.randint(1, 10), random_date(rng)
+                )
+        self.total_reviews = review_id
+
+    def comments(self, rng, options):
+        if not self.total_reviews:
+            return
+        for comment_id in range(1, options['comments'] + 1):
+            yield (
+                comment_id,
+                skewed_id(rng, self.total_reviews, options['skew']),
+                f'Комментарий {comment_id}',
+                rng.randint(1, options['users']),
+                random_date(rng)
+            )
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['genres'], options['categories'],
+               options['titles']) < 1:
+            raise CommandError(
+                'Нужны хотя бы один пользователь, жанр, категория '
+                'и произведение'
+            )
+        os.makedirs(options['path'], exist_ok=True)
+        generators = {
+            CustomUser: self.users,
+            Genre: self.genres,
+            Category: self.categories,
+            Title: self.titles,
+            Review: self.reviews,
+            Comment: self.comments,
+            GenreTitle: self.genre_titles,
+        }
+        self.total_reviews = 0
+        for model, csv_name in DICT.items():
+            rng = random.Random(f'{options["seed"]}:{csv_name}')
+            rows = 0
+            with open(
+                os.path.join(options['path'], csv_name), 'w',
+                newline='', encoding='utf8'
+            ) as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(FIELDS[model])
+                for row in generators[model](rng, options):
+                    writer.writerow(row)
+                    rows += 1
+            self.stdout.write(f'{csv_name}: {rows} строк')
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Генерация завершена'
+            )
+        )
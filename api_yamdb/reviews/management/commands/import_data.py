@@ -1,13 +1,29 @@
 import csv
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                wait)
+from contextlib import contextmanager, nullcontext
+from itertools import islice
 
-from django.core.management.base import BaseCommand
-from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
-                            Title, User)
+from api.metrics import registry
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, connections, transaction
+from reviews.management.commands._import_worker import init_worker
+from reviews.management.commands.rebuild_rankings import rebuild_rankings
+from reviews.management.commands.rebuild_ratings import rebuild_ratings
+from reviews.models import (Category, Comment, CustomUser, Genre, GenreTitle,
+                            Review, Title)
 
 CSV_PATH = 'static/data/'
+CHECKPOINT_FILE = 'import_data.checkpoint.json'
+BATCH_SIZE = 1000
 FOREIGN_KEY_FIELDS = ('category', 'author')
 DICT = {
-    User: 'users.csv',
+    CustomUser: 'users.csv',
     Genre: 'genre.csv',
     Category: 'category.csv',
     Title: 'titles.csv',
@@ -15,32 +31,340 @@ DICT = {
     Comment: 'comments.csv',
     GenreTitle: 'genre_title.csv'
 }
+DEPENDENCIES = {
+    CustomUser: (),
+    Genre: (),
+    Category: (),
+    Title: (Category,),
+    Review: (Title, CustomUser),
+    Comment: (Review, CustomUser),
+    GenreTitle: (Title, Genre),
+}
+
+
+# Общая блокировка процессов импорта, передаётся им через init_worker.
+import_lock = threading.Lock()
+
+
+def write_lock():
+    """Блокировка записи пакета.
+
+    SQLite допускает одного писателя, а параллельные отложенные
+    транзакции падают с «database is locked», поэтому пакеты разных
+    процессов записываются по очереди; чтение CSV идёт параллельно.
+    """
+    return import_lock if connection.vendor == 'sqlite' else nullcontext()
+
+
+def convert_row(row):
+    """Переименование внешних ключей в поля вида <field>_id."""
+    for field in FOREIGN_KEY_FIELDS:
+        if field in row:
+            row[f'{field}_id'] = row.pop(field)
+    return row
+
+
+@contextmanager
+def keep_timestamps(model, columns):
+    """Даты из CSV вместо текущего времени.
+
+    bulk_create заполняет поля с auto_now и auto_now_add текущим
+    временем; на время записи эти признаки снимаются с полей, значения
+    которых есть в файле.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field.attname in columns and (
+            getattr(field, 'auto_now', False)
+            or getattr(field, 'auto_now_add', False)
+        )
+    ]
+    flags = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def csv_import(csv_data, model, batch_size=BATCH_SIZE, skip=0,
+               resume=False):
+    """Потоковый импорт данных из CSV-файла в базу данных.
+
+    Строки читаются пакетами по batch_size, каждый пакет сохраняется
+    в отдельной транзакции; даты из файла сохраняются как есть.
+    Генератор отдаёт число прочитанных строк каждого пакета.
 
+    Контрольная точка записывается после фиксации пакета, поэтому при
+    resume=True строки с уже сохранёнными id пропускаются, пока не
+    встретится пакет без таких строк.
+    """
 
-def csv_import(csv_data, model):
-    """Импорт данных из CSV-файла в базу данных."""
+    pk_field = model._meta.pk.attname
+    rows = islice(csv_data, skip, None)
+    while True:
+        batch = [convert_row(row) for row in islice(rows, batch_size)]
+        if not batch:
+            return
+        if resume:
+            existing = {
+                str(pk) for pk in model.objects.filter(
+                    pk__in=[row[pk_field] for row in batch]
+                ).values_list('pk', flat=True)
+            }
+            resume = bool(existing)
+        else:
+            existing = ()
+        objects = [
+            model(**row) for row in batch if row[pk_field] not in existing
+        ]
+        with write_lock(), transaction.atomic(), keep_timestamps(
+            model, batch[0]
+        ):
+            model.objects.bulk_create(objects, batch_size=batch_size)
+        yield len(batch)
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf8') as checkpoint_file:
+        return json.load(checkpoint_file)
+
+
+def save_checkpoint(path, checkpoint):
+    """Атомарная запись контрольной точки."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf8') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+    os.replace(tmp_path, path)
+
+
+def update_checkpoint(path, csv_name, rows):
+    """Запись прогресса одного файла, безопасная для параллельных задач."""
+    with import_lock:
+        checkpoint = load_checkpoint(path)
+        checkpoint[csv_name] = rows
+        save_checkpoint(path, checkpoint)
+
+
+def set_pragmas(journal_mode, synchronous):
+    """Установка режима журнала и fsync SQLite; возвращает прежние."""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        previous_journal_mode = cursor.fetchone()[0]
+        cursor.execute('PRAGMA synchronous')
+        previous_synchronous = cursor.fetchone()[0]
+        cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+        cursor.execute(f'PRAGMA synchronous = {synchronous}')
+    return previous_journal_mode, previous_synchronous
+
+
+def prepare_fast_connection():
+    """Соединение без журнала, fsync и проверки внешних ключей."""
+    previous = set_pragmas('OFF', 'OFF')
+    connection.disable_constraint_checking()
+    return previous
+
+
+def drop_indexes(tables):
+    """Удаление вторичных индексов; возвращает SQL для их пересоздания.
+
+    Индексы UNIQUE/PRIMARY KEY из определения таблицы (sqlite_autoindex)
+    в SQLite не удаляются без пересоздания таблицы и остаются на месте.
+    """
+    placeholders = ', '.join(['%s'] * len(tables))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT name, sql FROM sqlite_master WHERE type = %s '
+            f'AND tbl_name IN ({placeholders}) AND sql IS NOT NULL',
+            ['index', *tables]
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    return [sql for _, sql in indexes]
 
-    objects = []
-    for row in csv_data:
-        for field in FOREIGN_KEY_FIELDS:
-            if field in row:
-                row[f'{field}_id'] = row[field]
-                del row[field]
-        objects.append(model(**row))
-    model.objects.bulk_create(objects)
+
+@contextmanager
+def fast_load(models, stdout):
+    """Загрузка в пустую базу SQLite без индексов и проверок ключей.
+
+    После загрузки индексы пересоздаются, а целостность внешних ключей
+    проверяется целиком.
+    """
+    tables = [model._meta.db_table for model in models]
+    previous = prepare_fast_connection()
+    indexes = drop_indexes(tables)
+    try:
+        yield
+    finally:
+        started = time.monotonic()
+        with connection.cursor() as cursor:
+            for sql in indexes:
+                cursor.execute(sql)
+        set_pragmas(*previous)
+        connection.enable_constraint_checking()
+        stdout.write(
+            f'Индексы пересозданы за {time.monotonic() - started:.2f} с'
+        )
+    try:
+        connection.check_constraints(table_names=tables)
+    except IntegrityError as error:
+        raise CommandError(f'Нарушена целостность данных: {error}')
+
+
+def import_file(model, csv_path, batch_size, checkpoint_path, fast=False,
+                resume=False):
+    """Импорт одного CSV-файла; возвращает число строк и время загрузки."""
+    if fast:
+        prepare_fast_connection()
+    csv_name = os.path.basename(csv_path)
+    skip = load_checkpoint(checkpoint_path).get(csv_name, 0)
+    rows = 0
+    started = time.monotonic()
+    with open(csv_path, newline='', encoding='utf8') as csv_file:
+        for loaded in csv_import(
+            csv.DictReader(csv_file), model, batch_size, skip, resume
+        ):
+            rows += loaded
+            update_checkpoint(checkpoint_path, csv_name, skip + rows)
+    return rows, time.monotonic() - started
+
+
+def run_now(func, *args):
+    """Синхронное выполнение задачи с интерфейсом Executor.submit."""
+    future = Future()
+    future.set_result(func(*args))
+    return future
+
+
+def schedule(dependencies, start):
+    """Запуск задач в порядке графа зависимостей.
+
+    start(key) запускает задачу и возвращает Future. Задача запускается,
+    как только завершены все задачи, от которых она зависит. Генератор
+    отдаёт пары (ключ, результат) по мере завершения.
+    """
+    pending = dict(dependencies)
+    running = {}
+    done = set()
+    while pending or running:
+        for key in [
+            key for key, requires in pending.items()
+            if set(requires) <= done
+        ]:
+            del pending[key]
+            running[start(key)] = key
+        if not running:
+            raise ValueError(
+                f'Циклическая зависимость: {", ".join(map(str, pending))}'
+            )
+        finished, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in finished:
+            key = running.pop(future)
+            done.add(key)
+            yield key, future.result()
+
+
+def can_load_concurrently():
+    """Параллельная запись невозможна в базу SQLite в памяти."""
+    return not (
+        connection.vendor == 'sqlite' and connection.is_in_memory_db()
+    )
 
 
 class Command(BaseCommand):
     help = 'импорт из .csv'
 
-    def handle(self, *args, **kwargs):
-        for model in DICT:
-            with open(
-                CSV_PATH + DICT[model],
-                newline='',
-                encoding='utf8'
-            ) as csv_file:
-                csv_import(csv.DictReader(csv_file), model)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=CSV_PATH,
+            help='каталог с CSV-файлами'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='количество строк в одной транзакции'
+        )
+        parser.add_argument(
+            '--checkpoint', default=CHECKPOINT_FILE,
+            help='файл контрольной точки'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='продолжить импорт с контрольной точки'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='количество процессов для независимых таблиц'
+        )
+        parser.add_argument(
+            '--fast', action='store_true',
+            help=(
+                'быстрая загрузка в пустую базу SQLite: без журнала, '
+                'вторичных индексов и проверки внешних ключей'
+            )
+        )
+
+    def report(self, csv_name, rows, elapsed):
+        self.stdout.write(
+            f'{csv_name}: {rows} строк за {elapsed:.2f} с '
+            f'({rows / elapsed if elapsed else 0:.0f} строк/с)'
+        )
+
+    def import_all(self, submit, options):
+        def start(model):
+            return submit(
+                import_file,
+                model,
+                os.path.join(options['path'], DICT[model]),
+                options['batch_size'],
+                options['checkpoint'],
+                options['fast'],
+                options['resume']
+            )
+
+        total = 0
+        for model, (rows, elapsed) in schedule(DEPENDENCIES, start):
+            self.report(DICT[model], rows, elapsed)
+            labels = {'table': model._meta.db_table}
+            registry.inc('import_rows_total', labels, rows)
+            registry.inc('import_duration_seconds_total', labels, elapsed)
+            total += rows
+        return total
+
+    def load(self, options):
+        if options['workers'] > 1 and can_load_concurrently():
+            connections.close_all()
+            with ProcessPoolExecutor(
+                options['workers'], initializer=init_worker,
+                initargs=(multiprocessing.Lock(),)
+            ) as executor:
+                return self.import_all(executor.submit, options)
+        return self.import_all(run_now, options)
+
+    def handle(self, *args, **options):
+        if not options['resume'] and os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+        started = time.monotonic()
+        if options['fast']:
+            if connection.vendor != 'sqlite':
+                raise CommandError('Режим --fast доступен только для SQLite')
+            if not options['resume'] and any(
+                model.objects.exists() for model in DICT
+            ):
+                raise CommandError('Режим --fast требует пустую базу данных')
+            with fast_load(DICT, self.stdout):
+                total = self.load(options)
+        else:
+            total = self.load(options)
+        rebuild_ratings()
+        rebuild_rankings()
+        if os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+        self.report('Итого', total, time.monotonic() - started)
         self.stdout.write(
             self.style.SUCCESS(
                 'Загрузка завершена'
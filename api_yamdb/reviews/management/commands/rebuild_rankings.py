@@ -0,0 +1,58 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import Review, Title, TitleRanking
+from reviews.rankings import (bayesian_rating, mean_score,
+                              remember_mean_score, trending_weight)
+
+BATCH_SIZE = 1000
+
+
+def trending_scores(now):
+    """Сумма весов свежих отзывов по произведениям."""
+    scores = defaultdict(float)
+    for title_id, pub_date in Review.objects.filter(
+        pub_date__gte=now - settings.RANKING_TRENDING_WINDOW
+    ).values_list('title_id', 'pub_date').iterator():
+        scores[title_id] += trending_weight(pub_date, now)
+    return scores
+
+
+def rebuild_rankings(now=None):
+    """Полный пересчёт таблицы рейтингов; возвращает число произведений."""
+    now = now or timezone.now()
+    mean = mean_score()
+    remember_mean_score(mean)
+    trending = trending_scores(now)
+    rankings = (
+        TitleRanking(
+            title_id=title_id,
+            bayesian_rating=bayesian_rating(score_sum, score_count, mean),
+            trending_score=trending.get(title_id, 0)
+        )
+        for title_id, score_sum, score_count in Title.objects.values_list(
+            'id', 'rating_sum', 'rating_count'
+        ).iterator()
+    )
+    with transaction.atomic():
+        TitleRanking.objects.all().delete()
+        created = TitleRanking.objects.bulk_create(
+            rankings, batch_size=BATCH_SIZE
+        )
+    return len(created)
+
+
+class Command(BaseCommand):
+    help = 'пересчёт лидербордов произведений'
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_rankings()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Рейтинги пересчитаны: {count} произведений'
+            )
+        )
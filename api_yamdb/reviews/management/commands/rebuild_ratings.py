@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from reviews.models import Review, Title
+
+
+def rebuild_ratings(title_model=Title, review_model=Review):
+    """Пересчёт хранимого рейтинга всех произведений по отзывам."""
+
+    reviews = review_model.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    score_sum = Subquery(
+        reviews.annotate(total=Sum('score')).values('total'),
+        output_field=IntegerField()
+    )
+    score_count = Subquery(
+        reviews.annotate(total=Count('pk')).values('total'),
+        output_field=IntegerField()
+    )
+    title_model.objects.update(
+        rating_sum=Coalesce(score_sum, 0),
+        rating_count=Coalesce(score_count, 0),
+        rating=score_sum / score_count
+    )
+
+
+class Command(BaseCommand):
+    help = 'пересчёт рейтинга произведений'
+
+    def handle(self, *args, **kwargs):
+        rebuild_ratings()
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Рейтинг произведений пересчитан'
+            )
+        )
@@ -0,0 +1,171 @@
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from reviews.models import CustomUser, Recommendation, Review, TitleFactors
+from reviews.rankings import mean_score
+from reviews.recommendations import (
+    Scorer, least_squares, rating_matrix, review_array, row_columns, train
+)
+
+BATCH_SIZE = 500
+
+
+def load_ratings(mean, reviews=None, user_ids=None, title_ids=None):
+    """Центрированные оценки: матрица (пользователь × произведение).
+
+    Без user_ids и title_ids строки и столбцы — все авторы и произведения
+    из выборки. Возвращает id строк, id столбцов и матрицу.
+    """
+    reviews = review_array(
+        Review.objects.all() if reviews is None else reviews
+    )
+    if user_ids is None:
+        user_ids = np.unique(reviews['author'])
+    if title_ids is None:
+        title_ids = np.unique(reviews['title'])
+    return user_ids, title_ids, rating_matrix(
+        user_ids, title_ids, reviews['author'], reviews['title'],
+        reviews['score'] - mean
+    )
+
+
+def save_recommendations(users, scorer, started):
+    """Запись рекомендаций пакетами по BATCH_SIZE пользователей.
+
+    users — тройки (id пользователя, вектор, номера оценённых им
+    произведений); при векторе None рекомендации пользователя удаляются.
+    """
+    for start in range(0, len(users), BATCH_SIZE):
+        batch = users[start:start + BATCH_SIZE]
+        known = [user for user in batch if user[1] is not None]
+        recommendations = []
+        if known:
+            user_ids, vectors, rated = zip(*known)
+            for user_id, top in zip(user_ids, scorer.top(
+                vectors, settings.RECOMMENDATIONS_COUNT, rated
+            )):
+                recommendations.extend(
+                    Recommendation(user_id=user_id, title_id=title_id,
+                                   score=score)
+                    for score, title_id in top
+                )
+        user_ids = [user_id for user_id, _, _ in batch]
+        with transaction.atomic():
+            Recommendation.objects.filter(user__in=user_ids).delete()
+            Recommendation.objects.bulk_create(
+                recommendations, batch_size=BATCH_SIZE
+            )
+            CustomUser.objects.filter(pk__in=user_ids).update(
+                recommendations_updated_at=started
+            )
+
+
+def stale_users():
+    """id пользователей, чьи отзывы изменились после пересчёта.
+
+    Удаление отзыва сбрасывает дату пересчёта сигналом.
+    """
+    reviewed = Review.objects.filter(
+        Q(author__recommendations_updated_at=None)
+        | Q(updated_at__gt=F('author__recommendations_updated_at'))
+    ).values_list('author_id', flat=True)
+    cleared = Recommendation.objects.filter(
+        user__recommendations_updated_at=None
+    ).values_list('user_id', flat=True)
+    return set(reviewed.order_by().distinct()) | set(
+        cleared.order_by().distinct()
+    )
+
+
+def rebuild_recommendations():
+    """Полный пересчёт: разложение всех оценок и рекомендации всем.
+
+    Возвращает число пользователей с рекомендациями.
+    """
+    started = timezone.now()
+    mean = mean_score()
+    user_ids, title_ids, matrix = load_ratings(mean)
+    vectors, titles = train(
+        matrix, settings.RECOMMENDATION_FACTORS,
+        settings.RECOMMENDATION_ITERATIONS,
+        settings.RECOMMENDATION_REGULARIZATION
+    )
+    with transaction.atomic():
+        TitleFactors.objects.all().delete()
+        TitleFactors.objects.bulk_create(
+            (TitleFactors(title_id=pk, vector=vector)
+             for pk, vector in zip(title_ids.tolist(), titles.tolist())),
+            batch_size=BATCH_SIZE
+        )
+    users = list(zip(user_ids.tolist(), vectors, row_columns(matrix)))
+    users.extend(
+        (user_id, None, None) for user_id in Recommendation.objects.exclude(
+            user__in=Review.objects.values('author')
+        ).values_list('user_id', flat=True).order_by().distinct()
+    )
+    save_recommendations(users, Scorer(title_ids, titles, mean), started)
+    return len(user_ids)
+
+
+def refresh_recommendations():
+    """Пересчёт для пользователей с новыми отзывами.
+
+    Векторы произведений берутся из последнего полного пересчёта, вектор
+    пользователя подбирается по его оценкам пакетами по BATCH_SIZE
+    пользователей. Возвращает число пересчитанных пользователей.
+    """
+    started = timezone.now()
+    user_ids = sorted(stale_users())
+    if not user_ids:
+        return 0
+    mean = mean_score()
+    title_ids, titles = [], []
+    for title_id, vector in TitleFactors.objects.order_by(
+        'title_id'
+    ).values_list('title_id', 'vector').iterator():
+        title_ids.append(title_id)
+        titles.append(vector)
+    title_ids = np.array(title_ids, dtype='i8')
+    titles = np.array(titles, dtype='f8').reshape(
+        len(title_ids), settings.RECOMMENDATION_FACTORS
+    )
+    scorer = Scorer(title_ids, titles, mean)
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = np.array(user_ids[start:start + BATCH_SIZE], dtype='i8')
+        _, _, matrix = load_ratings(
+            mean, Review.objects.filter(author__in=batch.tolist()),
+            batch, title_ids
+        )
+        vectors = least_squares(
+            matrix, titles, settings.RECOMMENDATION_REGULARIZATION
+        )
+        save_recommendations([
+            (user_id, vector if len(rated) else None, rated)
+            for user_id, vector, rated in zip(
+                batch.tolist(), vectors, row_columns(matrix)
+            )
+        ], scorer, started)
+    return len(user_ids)
+
+
+class Command(BaseCommand):
+    help = 'пересчёт персональных рекомендаций'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='пересчитать только пользователей с новыми отзывами'
+        )
+
+    def handle(self, *args, **options):
+        if options['incremental']:
+            count = refresh_recommendations()
+        else:
+            count = rebuild_recommendations()
+        self.stdout.write(
+            self.style.SUCCESS(f'Рекомендации пересчитаны: {count}')
+        )
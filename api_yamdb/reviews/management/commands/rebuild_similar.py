@@ -0,0 +1,94 @@
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from scipy.sparse import csr_matrix, diags
+
+from reviews.models import Review, SimilarTitle
+from reviews.recommendations import review_array
+
+BATCH_SIZE = 500
+
+
+def rating_matrix():
+    """Нормированные векторы оценок произведений.
+
+    Возвращает id произведений и разреженную матрицу (произведение ×
+    автор), строки которой — векторы оценок единичной длины. Отзывы
+    читаются одним проходом.
+    """
+    reviews = review_array(Review.objects.all())
+    title_ids, rows = np.unique(reviews['title'], return_inverse=True)
+    author_ids, columns = np.unique(reviews['author'], return_inverse=True)
+    matrix = csr_matrix(
+        (reviews['score'], (rows, columns)),
+        shape=(len(title_ids), len(author_ids))
+    )
+    norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+    return title_ids, diags(1 / norms) @ matrix
+
+
+def nearest(columns, scores, count):
+    """count столбцов с наибольшими scores, по убыванию оценки."""
+    if len(scores) > count:
+        best = np.argpartition(-scores, count - 1)[:count]
+        columns, scores = columns[best], scores[best]
+    order = np.lexsort((-columns, -scores))
+    return columns[order], scores[order]
+
+
+def rebuild_similar(batch_size=BATCH_SIZE):
+    """Пересчёт похожих произведений (косинусная мера по оценкам).
+
+    Косинусы считаются произведением разреженных матриц для пакета из
+    batch_size произведений, для каждого сохраняются
+    SIMILAR_TITLES_COUNT ближайших соседей. Возвращает число
+    сохранённых пар.
+    """
+    count = 0
+    SimilarTitle.objects.exclude(
+        title__in=Review.objects.values('title')
+    ).delete()
+    title_ids, matrix = rating_matrix()
+    transposed = matrix.T.tocsr()
+    title_ids = title_ids.tolist()
+    for start in range(0, len(title_ids), batch_size):
+        products = (matrix[start:start + batch_size] @ transposed).tocsr()
+        similar = []
+        for offset in range(products.shape[0]):
+            row = slice(*products.indptr[offset:offset + 2])
+            columns, scores = products.indices[row], products.data[row]
+            others = columns != start + offset
+            columns, scores = nearest(
+                columns[others], scores[others],
+                settings.SIMILAR_TITLES_COUNT
+            )
+            similar.extend(
+                SimilarTitle(
+                    title_id=title_ids[start + offset],
+                    similar_id=title_ids[column], score=score
+                )
+                for column, score in zip(columns.tolist(), scores.tolist())
+            )
+        batch = title_ids[start:start + batch_size]
+        with transaction.atomic():
+            SimilarTitle.objects.filter(title__in=batch).delete()
+            SimilarTitle.objects.bulk_create(similar, batch_size=batch_size)
+        count += len(similar)
+    return count
+
+
+class Command(BaseCommand):
+    help = 'пересчёт похожих произведений'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='число произведений, обрабатываемых за один проход'
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_similar(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Похожие произведения пересчитаны: {count}')
+        )
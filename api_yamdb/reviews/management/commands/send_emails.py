@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews.outbox import send_batch
+
+
+class Command(BaseCommand):
+    help = 'отправка писем из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='число писем, отправляемых через одно соединение'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='работать постоянно, проверяя очередь каждые --interval с'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='пауза между проверками пустой очереди, с'
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_batch(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Отправлено писем: {total_sent}, ошибок: {total_failed}'
+            )
+        )
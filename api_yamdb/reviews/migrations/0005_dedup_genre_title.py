@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-18 19:59
+
+from django.db import migrations
+from django.db.models import Min
+
+
+def remove_duplicates(apps, schema_editor):
+    """Удаление повторных связей жанра и произведения, кроме первой."""
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    first_ids = (
+        GenreTitle.objects.values('title', 'genre')
+        .annotate(first_id=Min('id')).values('first_id')
+    )
+    GenreTitle.objects.exclude(id__in=first_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+    ]
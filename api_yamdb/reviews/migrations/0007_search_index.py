@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 20:01
+
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    from reviews.search import create_search_index
+
+    create_search_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    from reviews.search import drop_search_index
+
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
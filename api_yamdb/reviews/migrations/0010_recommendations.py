@@ -0,0 +1,52 @@
+# Generated by Django 3.2 on 2026-10-18 20:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_similar_title'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleFactors',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='factors', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('vector', models.JSONField(verbose_name='Факторы')),
+            ],
+            options={
+                'verbose_name': 'Факторы произведения',
+                'verbose_name_plural': 'Факторы произведений',
+            },
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='recommendations_updated_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Дата пересчёта рекомендаций'),
+        ),
+        migrations.CreateModel(
+            name='Recommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Ожидаемая оценка')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='reviews.title', verbose_name='Произведение')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Рекомендация',
+                'verbose_name_plural': 'Рекомендации',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recommendation',
+            index=models.Index(fields=['user', '-score'], name='recommendation_user_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recommendation',
+            constraint=models.UniqueConstraint(fields=('user', 'title'), name='unique_recommendation'),
+        ),
+    ]
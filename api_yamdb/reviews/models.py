@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 from api.constants import (CONFIRMATION_CODE_MAX_LENGTH, EMAIL_MAX_LENGTH,
                            MAX_LENGHT, USERNAME_MAX_LENGTH)
@@ -48,6 +49,16 @@ class CustomUser(AbstractUser):
         blank=True,
         verbose_name='Код входа'
     )
+    token_version = models.PositiveIntegerField(
+        'Версия токенов',
+        default=0,
+        editable=False
+    )
+    recommendations_updated_at = models.DateTimeField(
+        'Дата пересчёта рекомендаций',
+        null=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -56,6 +67,22 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        """Сохранение без версии токенов у существующего пользователя.
+
+        Версия увеличивается только запросом UPDATE с F-выражением
+        (api.authentication.revoke_tokens); загруженное до отзыва значение
+        вернуло бы силу отозванным токенам.
+        """
+        if (not args and not self._state.adding
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'token_version'
+            ]
+        super().save(*args, **kwargs)
+
     @property
     def is_admin(self):
         return self.role == ADMIN or self.is_superuser
@@ -93,6 +120,9 @@ class Genre(BaseCategory):
         verbose_name_plural = 'Жанры'
 
 
+RATING_FIELDS = ('rating_sum', 'rating_count', 'rating')
+
+
 class Title(models.Model):
     """Наименование и атрибуты произведений."""
 
@@ -111,17 +141,81 @@ class Title(models.Model):
         Category,
         on_delete=models.SET_NULL,
         related_name='titles',
-        null=True
+        null=True,
+        # выборки по категории покрывает индекс (category, year)
+        db_index=False
+    )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False
     )
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок',
+        default=0,
+        editable=False
+    )
+    rating = models.PositiveSmallIntegerField(
+        'Рейтинг',
+        null=True,
+        editable=False
+    )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=('name',), name='title_name_idx'),
+            models.Index(
+                fields=('category', 'year'),
+                name='title_category_year_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.name}'
 
+    def save(self, *args, **kwargs):
+        """Сохранение без полей рейтинга у существующего произведения.
+
+        Рейтинг меняется только запросами UPDATE с F-выражениями
+        (reviews.signals, rebuild_ratings); загруженные ранее значения
+        затёрли бы параллельные изменения оценок.
+        """
+        if (not args and not self._state.adding
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in RATING_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 
 class GenreTitle(models.Model):
-    """Связывающая модель для ManyToMany."""
-    title = models.ForeignKey(Title, on_delete=models.CASCADE)
-    genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
+    """Связывающая модель для ManyToMany.
+
+    Отдельные индексы внешних ключей не нужны: выборки по произведению
+    покрывает уникальный индекс (title, genre), по жанру — (genre, title).
+    """
+    title = models.ForeignKey(Title, on_delete=models.CASCADE,
+                              db_index=False)
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE,
+                              db_index=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('title', 'genre'),
+                name='unique_genre_title'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('genre', 'title'),
+                name='genretitle_genre_title_idx'
+            )
+        ]
 
 
 class TextAuthorDateBaseModel(models.Model):
@@ -138,9 +232,13 @@ class TextAuthorDateBaseModel(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
         abstract = True
 
     def __str__(self):
@@ -168,6 +266,16 @@ class Review(TextAuthorDateBaseModel):
                 name='unique_title_author'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('title', '-pub_date', '-id'),
+                name='review_title_pub_date_idx'
+            ),
+            models.Index(
+                fields=('title', 'updated_at'),
+                name='review_title_updated_at_idx'
+            )
+        ]
 
 
 class Comment(TextAuthorDateBaseModel):
@@ -181,3 +289,158 @@ class Comment(TextAuthorDateBaseModel):
         default_related_name = 'comments'
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=('review', '-pub_date', '-id'),
+                name='comment_review_pub_date_idx'
+            ),
+            models.Index(
+                fields=('review', 'updated_at'),
+                name='comment_review_updated_at_idx'
+            )
+        ]
+
+
+class TitleRanking(models.Model):
+    """Предрассчитанные показатели произведения для лидербордов."""
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+        verbose_name='Произведение'
+    )
+    bayesian_rating = models.FloatField('Взвешенный рейтинг', default=0)
+    trending_score = models.FloatField('Популярность', default=0)
+    updated_at = models.DateTimeField('Дата пересчёта', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Рейтинг произведения'
+        verbose_name_plural = 'Рейтинги произведений'
+        indexes = [
+            models.Index(
+                fields=('-bayesian_rating',),
+                name='ranking_bayesian_idx'
+            ),
+            models.Index(
+                fields=('-trending_score',),
+                name='ranking_trending_idx'
+            ),
+        ]
+
+
+class SimilarTitle(models.Model):
+    """Похожее произведение по оценкам пользователей (предрассчитано)."""
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='similar',
+        verbose_name='Произведение',
+        # выборки по произведению покрывает индекс (title, -score)
+        db_index=False
+    )
+    similar = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожее произведение'
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        verbose_name = 'Похожее произведение'
+        verbose_name_plural = 'Похожие произведения'
+        indexes = [
+            models.Index(
+                fields=('title', '-score'), name='similar_title_score_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=('title', 'similar'), name='unique_similar_title'
+            ),
+        ]
+
+
+class TitleFactors(models.Model):
+    """Скрытые факторы произведения из матричного разложения оценок."""
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='factors',
+        verbose_name='Произведение'
+    )
+    vector = models.JSONField('Факторы')
+
+    class Meta:
+        verbose_name = 'Факторы произведения'
+        verbose_name_plural = 'Факторы произведений'
+
+
+class Recommendation(models.Model):
+    """Рекомендованное пользователю произведение (предрассчитано)."""
+
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь',
+        # выборки по пользователю покрывает индекс (user, -score)
+        db_index=False
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Произведение'
+    )
+    score = models.FloatField('Ожидаемая оценка')
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        indexes = [
+            models.Index(
+                fields=('user', '-score'), name='recommendation_user_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'title'), name='unique_recommendation'
+            ),
+        ]
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку командой send_emails."""
+
+    recipient = models.EmailField(
+        'Получатель', max_length=EMAIL_MAX_LENGTH
+    )
+    subject = models.CharField('Тема', max_length=MAX_LENGHT)
+    body = models.TextField('Текст')
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    next_attempt_at = models.DateTimeField(
+        'Дата следующей попытки', default=timezone.now
+    )
+    attempts = models.PositiveSmallIntegerField('Число попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    sent_at = models.DateTimeField('Дата отправки', null=True)
+
+    class Meta:
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(
+                fields=('next_attempt_at',),
+                condition=models.Q(sent_at=None),
+                name='outbox_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient} - {self.subject}'
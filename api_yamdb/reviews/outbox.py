@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def enqueue(recipient, subject, body):
+    """Постановка письма в очередь; отправляет его команда send_emails."""
+    return OutboxEmail.objects.create(
+        recipient=recipient, subject=subject, body=body
+    )
+
+
+def claim(batch_size):
+    """Выбор пакета писем к отправке.
+
+    Выбранные письма откладываются на EMAIL_OUTBOX_LEASE, поэтому
+    параллельные обработчики не берут их повторно; если обработчик
+    упадёт, письма вернутся в очередь по истечении этого срока.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(OutboxEmail.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            sent_at=None,
+            next_attempt_at__lte=now,
+            attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        ).order_by('next_attempt_at', 'pk')[:batch_size])
+        OutboxEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(next_attempt_at=now + settings.EMAIL_OUTBOX_LEASE)
+    return emails
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    return settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def mark_failed(email, error):
+    """Возврат письма в очередь с увеличенной задержкой."""
+    email.attempts += 1
+    email.last_error = repr(error)
+    email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+
+
+def send_batch(batch_size=None):
+    """Отправка пакета писем через одно соединение с почтовым сервером.
+
+    Неотправленные письма возвращаются в очередь с увеличенной задержкой,
+    после EMAIL_OUTBOX_MAX_ATTEMPTS попыток остаются с текстом ошибки.
+    Если соединение не открылось, неотправленным считается весь пакет.
+    Возвращает пару (отправлено, ошибок).
+    """
+    emails = claim(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+    sent, failed = [], []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            mark_failed(email, error)
+        failed = emails
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject, email.body, settings.ADMIN_EMAIL,
+                    [email.recipient], connection=connection
+                )
+                try:
+                    message.send()
+                except Exception as error:
+                    mark_failed(email, error)
+                    failed.append(email)
+                else:
+                    sent.append(email.pk)
+        finally:
+            connection.close()
+    OutboxEmail.objects.filter(pk__in=sent).update(sent_at=timezone.now())
+    OutboxEmail.objects.bulk_update(
+        failed, ('attempts', 'last_error', 'next_attempt_at')
+    )
+    return len(sent), len(failed)
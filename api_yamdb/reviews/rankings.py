@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.db.models import Sum
+
+from api.cache import get_cache
+from .models import Title
+
+MEAN_SCORE_KEY = 'reviews:mean_score'
+
+
+def mean_score(title_model=Title):
+    """Средняя оценка по всему каталогу."""
+    totals = title_model.objects.aggregate(
+        score_sum=Sum('rating_sum'), score_count=Sum('rating_count')
+    )
+    if not totals['score_count']:
+        return 0
+    return totals['score_sum'] / totals['score_count']
+
+
+def remember_mean_score(mean):
+    get_cache().set(MEAN_SCORE_KEY, mean, settings.RANKING_MEAN_TIMEOUT)
+
+
+def cached_mean_score():
+    """Средняя оценка каталога для пересчёта рейтинга при записи отзыва.
+
+    Берётся из кэша API_CACHE_ALIAS, который обновляет rebuild_rankings;
+    без него пересчитывается не чаще раза в RANKING_MEAN_TIMEOUT секунд.
+    """
+    mean = get_cache().get(MEAN_SCORE_KEY)
+    if mean is None:
+        mean = mean_score()
+        remember_mean_score(mean)
+    return mean
+
+
+def bayesian_rating(score_sum, score_count, mean):
+    """Рейтинг, сглаженный RANKING_PRIOR_REVIEWS средними оценками."""
+    prior = settings.RANKING_PRIOR_REVIEWS
+    return (prior * mean + score_sum) / (prior + score_count)
+
+
+def trending_weight(pub_date, now):
+    """Вес отзыва в популярности произведения.
+
+    Вес убывает вдвое каждые RANKING_TRENDING_HALF_LIFE; отзывы старше
+    RANKING_TRENDING_WINDOW не учитываются.
+    """
+    if pub_date < now - settings.RANKING_TRENDING_WINDOW:
+        return 0
+    age = max((now - pub_date).total_seconds(), 0)
+    return 0.5 ** (age / settings.RANKING_TRENDING_HALF_LIFE.total_seconds())
@@ -0,0 +1,140 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+SEED = 0
+REVIEW_DTYPE = [('author', 'i8'), ('title', 'i8'), ('score', 'f8')]
+# Число оценок, по которым за раз строятся системы уравнений: память
+# под промежуточные матрицы — SOLVE_BATCH × size² чисел.
+SOLVE_BATCH = 20000
+
+
+def review_array(reviews):
+    """Оценки из выборки отзывов одним проходом.
+
+    Возвращает структурный массив с полями author, title и score.
+    """
+    return np.fromiter(
+        reviews.order_by().values_list(
+            'author_id', 'title_id', 'score'
+        ).iterator(),
+        dtype=REVIEW_DTYPE
+    )
+
+
+def rating_matrix(row_ids, column_ids, rows, columns, ratings):
+    """Разреженная матрица оценок (строка × столбец).
+
+    row_ids и column_ids — отсортированные id строк и столбцов; оценки
+    с id, которых в них нет, пропускаются.
+    """
+    row_index = np.searchsorted(row_ids, rows)
+    column_index = np.searchsorted(column_ids, columns)
+    known = (row_index < len(row_ids)) & (column_index < len(column_ids))
+    known[known] = (
+        (row_ids[row_index[known]] == rows[known])
+        & (column_ids[column_index[known]] == columns[known])
+    )
+    return csr_matrix(
+        (ratings[known], (row_index[known], column_index[known])),
+        shape=(len(row_ids), len(column_ids))
+    )
+
+
+def row_columns(matrix):
+    """Номера столбцов с оценками для каждой строки матрицы."""
+    return np.split(matrix.indices, matrix.indptr[1:-1])
+
+
+def least_squares(matrix, factors, regularization):
+    """Векторы строк matrix, приближающие оценки произведениями p·q.
+
+    factors — векторы q столбцов матрицы. Для строки с n оценками r
+    решается система (QᵀQ + λ·n·I)p = Qᵀr: штраф регуляризации растёт
+    с числом оценок (weighted-λ ALS). Системы строятся и решаются
+    пакетами строк примерно по SOLVE_BATCH оценок; у строк без оценок
+    вектор нулевой.
+    """
+    size = factors.shape[1]
+    result = np.zeros((matrix.shape[0], size))
+    counts = np.diff(matrix.indptr)
+    start = 0
+    while start < matrix.shape[0]:
+        stop = max(start + 1, np.searchsorted(
+            matrix.indptr, matrix.indptr[start] + SOLVE_BATCH, 'right'
+        ) - 1)
+        first, last = matrix.indptr[start], matrix.indptr[stop]
+        vectors = factors[matrix.indices[first:last]]
+        owners = csr_matrix(
+            (np.ones(last - first), np.arange(last - first),
+             matrix.indptr[start:stop + 1] - first),
+            shape=(stop - start, last - first)
+        )
+        gram = (owners @ (
+            vectors[:, :, None] * vectors[:, None, :]
+        ).reshape(last - first, size * size)).reshape(-1, size, size)
+        gram += (
+            regularization * counts[start:stop, None, None] * np.eye(size)
+        )
+        rated = counts[start:stop] > 0
+        result[start:stop][rated] = np.linalg.solve(
+            gram[rated], (matrix[start:stop] @ factors)[rated][..., None]
+        )[..., 0]
+        start = stop
+    return result
+
+
+def train(matrix, size, iterations, regularization):
+    """Разложение методом чередующихся наименьших квадратов (ALS).
+
+    Центрированная оценка пользователя u (строка matrix) произведению i
+    (столбец) приближается скалярным произведением p_u·q_i; возвращаются
+    массивы векторов p и q по строкам и столбцам.
+    """
+    titles = np.random.default_rng(SEED).normal(
+        0, 0.1, (matrix.shape[1], size)
+    )
+    transposed = matrix.T.tocsr()
+    users = np.zeros((matrix.shape[0], size))
+    for _ in range(iterations):
+        users = least_squares(matrix, titles, regularization)
+        titles = least_squares(transposed, users, regularization)
+    return users, titles
+
+
+class Scorer:
+    """Ожидаемые оценки всех произведений для пакета пользователей.
+
+    title_ids отсортированы, factors — векторы произведений по строкам;
+    оценки пакета считаются одним умножением матриц.
+    """
+
+    def __init__(self, title_ids, factors, mean):
+        self.title_ids = title_ids
+        self.factors = factors
+        self.mean = mean
+
+    def top(self, vectors, count, excluded):
+        """count лучших пар (оценка, id) для каждого из векторов.
+
+        excluded — номера произведений в title_ids, которые не
+        рекомендуются, отдельно для каждого вектора.
+        """
+        scores = self.mean + np.asarray(vectors) @ self.factors.T
+        for row, columns in enumerate(excluded):
+            scores[row, columns] = -np.inf
+        count = min(count, scores.shape[1])
+        if not count:
+            return [[] for _ in scores]
+        best = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        return [
+            [
+                (score, title_id) for score, title_id in zip(
+                    row_scores.tolist(), self.title_ids[row].tolist()
+                ) if score != -np.inf
+            ]
+            for row_scores, row in zip(best_scores, best)
+        ]
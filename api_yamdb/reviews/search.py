@@ -0,0 +1,114 @@
+import re
+from functools import reduce
+from operator import and_, or_
+
+from django.db import connections
+from django.db.models import Q
+
+SEARCH_FIELDS = {
+    'reviews_title': ('name', 'description'),
+    'reviews_review': ('text',),
+}
+TRIGGERS = {
+    'ai': 'AFTER INSERT ON {table} BEGIN {insert}; END',
+    'ad': 'AFTER DELETE ON {table} BEGIN {delete}; END',
+    'au': 'AFTER UPDATE OF {columns} ON {table} BEGIN {delete}; {insert}; END',
+}
+
+
+def fts_table(table):
+    return f'{table}_fts'
+
+
+def is_supported(connection):
+    return connection.vendor == 'sqlite'
+
+
+def create_search_index(connection):
+    """Создание таблиц FTS5 и триггеров синхронизации.
+
+    Таблицы FTS5 ссылаются на исходные (external content) и хранят только
+    индекс. Миграции SQLite пересоздают таблицу при изменении полей и
+    удаляют её триггеры, поэтому функция вызывается и после каждого
+    migrate: недостающие объекты создаются, индекс перестраивается.
+    """
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        for table, fields in SEARCH_FIELDS.items():
+            fts = fts_table(table)
+            names = {fts, *(f'{fts}_{suffix}' for suffix in TRIGGERS)}
+            cursor.execute(
+                'SELECT name FROM sqlite_master WHERE name IN '
+                f'({", ".join(["%s"] * len(names))})', list(names)
+            )
+            if {name for name, in cursor.fetchall()} == names:
+                continue
+            columns = ', '.join(fields)
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5('
+                f"{columns}, content='{table}', content_rowid='id')"
+            )
+            statements = {
+                'table': table,
+                'columns': columns,
+                'insert': (
+                    f'INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, '
+                    + ', '.join(f'new.{field}' for field in fields) + ')'
+                ),
+                'delete': (
+                    f"INSERT INTO {fts}({fts}, rowid, {columns}) "
+                    "VALUES ('delete', old.id, "
+                    + ', '.join(f'old.{field}' for field in fields) + ')'
+                ),
+            }
+            for suffix, trigger in TRIGGERS.items():
+                cursor.execute(
+                    f'CREATE TRIGGER IF NOT EXISTS {fts}_{suffix} '
+                    + trigger.format(**statements)
+                )
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def drop_search_index(connection):
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        for table in SEARCH_FIELDS:
+            fts = fts_table(table)
+            for suffix in TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {fts}')
+
+
+def search_terms(text):
+    return re.findall(r'\w+', text)
+
+
+def search(queryset, text):
+    """Отбор объектов по словам из text с сортировкой по релевантности.
+
+    Каждое слово ищется по префиксу. В SQLite используется индекс FTS5 и
+    ранжирование bm25, в остальных СУБД — icontains без ранжирования.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+    table = queryset.model._meta.db_table
+    if not is_supported(connections[queryset.db]):
+        return queryset.filter(reduce(and_, (
+            reduce(or_, (
+                Q(**{f'{field}__icontains': term})
+                for field in SEARCH_FIELDS[table]
+            ))
+            for term in terms
+        )))
+    fts = fts_table(table)
+    query = ' '.join(f'"{term}"*' for term in terms)
+    return queryset.extra(
+        tables=[fts],
+        where=[f'{fts}.rowid = {table}.id', f'{fts} MATCH %s'],
+        params=[query],
+        select={'search_rank': f'{fts}.rank'},
+        order_by=['search_rank', '-id'],
+    )
@@ -0,0 +1,182 @@
+from django.db import connections
+from django.db.models import F, Value
+from django.db.models.functions import NullIf
+from django.db.models.signals import (m2m_changed, post_delete, post_migrate,
+                                      post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import (Category, Comment, CustomUser, Genre, GenreTitle,
+                     Review, Title, TitleRanking)
+from .rankings import bayesian_rating, cached_mean_score, trending_weight
+from .search import SEARCH_FIELDS, create_search_index, fts_table
+
+
+def update_title_rating(title_id, score_delta, count_delta):
+    """Инкрементальное обновление рейтинга произведения одним UPDATE."""
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score_delta,
+        rating_count=F('rating_count') + count_delta,
+        rating=(
+            (F('rating_sum') + score_delta)
+            / NullIf(F('rating_count') + count_delta, Value(0))
+        ),
+        updated_at=timezone.now()
+    )
+
+
+def update_title_ranking(title_id, trending_delta=0, create=True):
+    """Пересчёт взвешенного рейтинга произведения после изменения оценок.
+
+    Популярность изменяется на trending_delta и уточняется при полном
+    пересчёте командой rebuild_rankings. При create=False отсутствующая
+    строка рейтинга не создаётся: при удалении отзывов каскадом от
+    произведения её уже нет.
+    """
+    totals = Title.objects.filter(pk=title_id).values_list(
+        'rating_sum', 'rating_count'
+    ).first()
+    if totals is None:
+        return
+    rating = bayesian_rating(*totals, cached_mean_score())
+    updated = TitleRanking.objects.filter(title_id=title_id).update(
+        bayesian_rating=rating,
+        trending_score=F('trending_score') + trending_delta,
+        updated_at=timezone.now()
+    )
+    if not updated and create:
+        TitleRanking.objects.create(
+            title_id=title_id, bayesian_rating=rating,
+            trending_score=trending_delta
+        )
+
+
+def touch_titles(titles):
+    """Обновление даты изменения произведений без вызова save()."""
+    titles.update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, **kwargs):
+    instance._previous_score = None
+    if instance.pk is not None:
+        instance._previous_score = (
+            Review.objects.filter(pk=instance.pk)
+            .values_list('score', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def add_review_score(sender, instance, created, **kwargs):
+    previous_score = getattr(instance, '_previous_score', None)
+    if created or previous_score is None:
+        update_title_rating(instance.title_id, instance.score, 1)
+        update_title_ranking(instance.title_id, trending_delta=1)
+    elif previous_score != instance.score:
+        update_title_rating(
+            instance.title_id, instance.score - previous_score, 0
+        )
+        update_title_ranking(instance.title_id)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_score(sender, instance, **kwargs):
+    update_title_rating(instance.title_id, -instance.score, -1)
+    update_title_ranking(
+        instance.title_id,
+        trending_delta=-trending_weight(instance.pub_date, timezone.now()),
+        create=False
+    )
+
+
+@receiver(post_delete, sender=Review)
+def reset_recommendations(sender, instance, **kwargs):
+    """Пометка рекомендаций автора для пересчёта rebuild_recommendations.
+
+    Новые и изменённые отзывы находятся по дате изменения.
+    """
+    CustomUser.objects.filter(pk=instance.author_id).update(
+        recommendations_updated_at=None
+    )
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_previous_username(sender, instance, update_fields=None,
+                               **kwargs):
+    instance._previous_username = None
+    if instance.pk is not None and (
+        update_fields is None or 'username' in update_fields
+    ):
+        instance._previous_username = (
+            CustomUser.objects.filter(pk=instance.pk)
+            .values_list('username', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=CustomUser)
+def touch_author_texts(sender, instance, created, **kwargs):
+    """Смена даты изменения отзывов и комментариев при смене имени.
+
+    Имя автора входит в ответы, поэтому меняются и их ETag и
+    Last-Modified.
+    """
+    previous_username = getattr(instance, '_previous_username', None)
+    if previous_username is None or previous_username == instance.username:
+        return
+    now = timezone.now()
+    Review.objects.filter(author=instance).update(updated_at=now)
+    Comment.objects.filter(author=instance).update(updated_at=now)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_title_on_genre_change(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        touch_titles(Title.objects.filter(pk=instance.pk))
+    elif pk_set:
+        touch_titles(Title.objects.filter(pk__in=pk_set))
+
+
+@receiver(pre_save, sender=GenreTitle)
+def remember_previous_link(sender, instance, **kwargs):
+    instance._previous_link = None
+    if instance.pk is not None:
+        instance._previous_link = (
+            GenreTitle.objects.filter(pk=instance.pk)
+            .values_list('title_id', 'genre_id').first()
+        )
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def touch_title_on_link_change(sender, instance, **kwargs):
+    """Прямое изменение связи с жанром, минуя m2m (например, в админке)."""
+    previous = getattr(instance, '_previous_link', None) or (None, None)
+    touch_titles(Title.objects.filter(
+        pk__in={instance.title_id, previous[0]} - {None}
+    ))
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_titles(sender, instance, **kwargs):
+    touch_titles(Title.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_genre_titles(sender, instance, **kwargs):
+    touch_titles(Title.objects.filter(genre=instance))
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, using, **kwargs):
+    """Восстановление триггеров поиска после пересоздания таблиц."""
+    if sender.label != 'reviews':
+        return
+    connection = connections[using]
+    tables = connection.introspection.table_names()
+    if all(fts_table(table) in tables for table in SEARCH_FIELDS):
+        create_search_index(connection)
@@ -0,0 +1,17 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from api.authentication import tokens, users
+    from api.autocomplete import index
+    from api.bitmap import index as bitmap_index
+
+    for cache in caches.all():
+        cache.clear()
+    index.clear()
+    bitmap_index.clear()
+    tokens.clear()
+    users.clear()
+    yield
@@ -0,0 +1,91 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json()['rating']
+
+    def test_01_rating_follows_reviews(self, admin_client, user_client,
+                                       moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert self.get_rating(admin_client, title_id) is None
+
+        create_single_review(admin_client, title_id, 'Хорошо', 8)
+        review = create_single_review(
+            user_client, title_id, 'Так себе', 4
+        ).json()
+        assert self.get_rating(admin_client, title_id) == 6, (
+            'Проверьте, что рейтинг произведения пересчитывается '
+            'при создании отзыва.'
+        )
+
+        user_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{review["id"]}/',
+            data={'score': 10}
+        )
+        assert self.get_rating(admin_client, title_id) == 9, (
+            'Проверьте, что рейтинг произведения пересчитывается '
+            'при изменении оценки.'
+        )
+
+        create_single_review(moderator_client, title_id, 'Плохо', 1)
+        assert self.get_rating(admin_client, title_id) == 6
+
+        user_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{review["id"]}/'
+        )
+        assert self.get_rating(admin_client, title_id) == 4, (
+            'Проверьте, что рейтинг произведения пересчитывается '
+            'при удалении отзыва.'
+        )
+        assert self.get_rating(admin_client, titles[1]['id']) is None
+
+    def test_02_rebuild_ratings(self, admin_client, user_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(admin_client, title_id, 'Хорошо', 8)
+        create_single_review(user_client, title_id, 'Отлично', 10)
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+
+        call_command('rebuild_ratings')
+
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            18, 2, 9
+        )
+        empty_title = Title.objects.get(pk=titles[1]['id'])
+        assert (
+            empty_title.rating_sum, empty_title.rating_count,
+            empty_title.rating
+        ) == (0, 0, None)
+
+    def test_03_title_save_keeps_rating(self, admin_client, user_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        title = Title.objects.get(pk=title_id)
+        create_single_review(user_client, title_id, 'Хорошо', 8)
+        title.name = 'Новое название'
+        title.save()
+        assert self.get_rating(admin_client, title_id) == 8, (
+            'Проверьте, что сохранение произведения не затирает рейтинг, '
+            'изменённый после его загрузки.'
+        )
+        admin_client.patch(
+            f'/api/v1/titles/{title_id}/', data={'name': 'Другое'}
+        )
+        title.refresh_from_db()
+        assert (title.name, title.rating_count) == ('Другое', 1)
@@ -0,0 +1,55 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CursorPagination:
+
+    def collect_pages(self, client, url):
+        results = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+                'статусом 200.'
+            )
+            data = response.json()
+            for key in ('next', 'previous', 'results'):
+                assert key in data
+            results.extend(data['results'])
+            url = data['next']
+        return results
+
+    def test_01_cursor_pages_match_page_numbers(
+            self, client, admin_client, admin, user_client, user,
+            moderator_client, moderator, user_superuser_client,
+            user_superuser):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client,
+            user_superuser: user_superuser_client,
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        urls = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/',
+        )
+        for url in urls:
+            pages = self.collect_pages(client, url)
+            cursor_pages = self.collect_pages(
+                client, f'{url}?pagination=cursor&page_size=1'
+            )
+            assert len(cursor_pages) == len(author_map)
+            assert [obj['id'] for obj in cursor_pages] == [
+                obj['id'] for obj in pages
+            ], (
+                f'Проверьте, что курсорная пагинация `{url}` возвращает '
+                'объекты в том же порядке, что и постраничная.'
+            )
+            response = client.get(url)
+            assert response.json()['count'] == len(author_map)
@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import (count_queries, create_single_comment,
+                         create_single_review, create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10QueryCount:
+
+    def test_01_reviews_and_comments_constant_queries(
+            self, client, admin_client, user_client, moderator_client,
+            user_superuser_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = create_single_review(
+            admin_client, title_id, 'Первый отзыв', 5
+        ).json()
+        create_single_comment(
+            admin_client, title_id, review['id'], 'Первый комментарий'
+        )
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review["id"]}/comments/'
+        single_row_queries = (
+            count_queries(client, reviews_url),
+            count_queries(client, comments_url),
+        )
+
+        for author_client in (user_client, moderator_client,
+                              user_superuser_client):
+            create_single_review(author_client, title_id, 'Отзыв', 7)
+            create_single_comment(
+                author_client, title_id, review['id'], 'Комментарий'
+            )
+
+        assert (
+            count_queries(client, reviews_url),
+            count_queries(client, comments_url),
+        ) == single_row_queries, (
+            'Проверьте, что количество запросов к базе данных при получении '
+            'списка отзывов и комментариев не зависит от размера страницы.'
+        )
+
+    def test_02_comment_route_checks_title(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            admin_client, titles[0]['id'], 'Отзыв', 5
+        ).json()
+        response = client.get(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+            f'{review["id"]}/comments/'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что GET-запрос к '
+            '`/api/v1/titles/{title_id}/reviews/{review_id}/comments/` '
+            'возвращает ответ со статусом 404, если отзыв относится к '
+            'другому произведению.'
+        )
@@ -0,0 +1,55 @@
+import pytest
+
+from tests.utils import count_queries, create_single_review, create_titles
+
+
+@pytest.fixture
+def file_cache(settings, tmp_path):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ResponseCache:
+
+    @pytest.mark.parametrize('backend', ('locmem', 'filebased'))
+    def test_01_lists_cached_until_change(self, request, backend, client,
+                                          admin_client, user_client):
+        if backend == 'filebased':
+            request.getfixturevalue('file_cache')
+        titles, categories, genres = create_titles(admin_client)
+        for url in ('/api/v1/titles/', '/api/v1/categories/',
+                    '/api/v1/genres/'):
+            count_queries(client, url)
+            assert count_queries(client, url) == 0, (
+                f'Проверьте, что повторный GET-запрос к `{url}` '
+                'обслуживается из кэша.'
+            )
+
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Отзыв', 7)
+        results = client.get('/api/v1/titles/').json()['results']
+        rating = {title['id']: title['rating'] for title in results}
+        assert rating[title_id] == 7, (
+            'Проверьте, что кэш списка произведений сбрасывается при '
+            'создании отзыва.'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{title_id}/', data={'genre': [genres[2]['slug']]}
+        )
+        response = client.get(f'/api/v1/titles/?genre={genres[2]["slug"]}')
+        assert {title['id'] for title in response.json()['results']} == {
+            titles[0]['id'], titles[1]['id']
+        }, (
+            'Проверьте, что кэш списка произведений сбрасывается при '
+            'изменении жанров произведения.'
+        )
+
+        admin_client.delete(f'/api/v1/categories/{categories[1]["slug"]}/')
+        response = client.get('/api/v1/categories/')
+        assert response.json()['count'] == len(categories) - 1
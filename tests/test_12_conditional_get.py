@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ConditionalGet:
+
+    def check_not_modified(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        etag = response.get('ETag')
+        assert etag, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовок `ETag`.'
+        )
+        assert response.get('Last-Modified')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        return etag
+
+    def test_01_not_modified_until_change(self, client, admin_client, admin,
+                                          user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_url = f'{title_url}reviews/'
+        review_url = f'{reviews_url}{reviews[1]["id"]}/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        urls = (
+            '/api/v1/titles/', title_url, reviews_url, review_url,
+            comments_url, f'{comments_url}{comments[1]["id"]}/',
+        )
+        etags = {url: self.check_not_modified(client, url) for url in urls}
+
+        user_client.patch(review_url, data={'score': 1})
+        changed = (
+            '/api/v1/titles/', title_url, reviews_url, review_url
+        )
+        for url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            expected = (
+                HTTPStatus.OK if url in changed else HTTPStatus.NOT_MODIFIED
+            )
+            assert response.status_code == expected, (
+                f'Проверьте, что после изменения отзыва GET-запрос к `{url}` '
+                f'с прежним `If-None-Match` возвращает ответ со статусом '
+                f'{expected}.'
+            )
+
+        user_client.delete(f'{comments_url}{comments[1]["id"]}/')
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=etags[
+            comments_url
+        ])
+        assert response.status_code == HTTPStatus.OK
+
+    def test_02_missing_object(self, client, admin_client):
+        url = '/api/v1/titles/999/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.get(url, HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что GET-запрос к несуществующему объекту с '
+            '`If-None-Match` возвращает ответ со статусом 404, а не 304.'
+        )
+        assert not response.get('ETag')
+
+    def test_03_author_rename(self, client, admin_client, admin,
+                              user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        etags = {
+            url: self.check_not_modified(client, url)
+            for url in (reviews_url, comments_url)
+        }
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'renamed'}
+        )
+        for url, etag in etags.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после смены имени автора GET-запрос к '
+                f'`{url}` с прежним `If-None-Match` возвращает ответ со '
+                'статусом 200.'
+            )
+            assert 'renamed' in {
+                item['author'] for item in response.json()['results']
+            }
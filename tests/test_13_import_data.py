@@ -0,0 +1,204 @@
+import csv
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+from itertools import islice
+
+import pytest
+from django.core.management import call_command
+
+from tests.conftest import MANAGE_PATH
+
+DATA_PATH = os.path.join(MANAGE_PATH, 'static', 'data')
+WORKERS_SCRIPT = """
+import multiprocessing
+import sys
+
+import django
+from django.core.management import call_command
+
+multiprocessing.set_start_method('spawn')
+django.setup()
+call_command('migrate', verbosity=0)
+call_command('import_data', path=sys.argv[1], workers=3,
+             checkpoint=sys.argv[2])
+"""
+
+
+def csv_rows(csv_name):
+    with open(os.path.join(DATA_PATH, csv_name), encoding='utf8') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ImportData:
+
+    def test_01_import_in_batches(self, tmp_path):
+        from reviews.management.commands.import_data import DICT
+        from reviews.models import Title
+
+        checkpoint = tmp_path / 'checkpoint.json'
+        call_command(
+            'import_data', path=DATA_PATH, batch_size=7,
+            checkpoint=str(checkpoint)
+        )
+        for model, csv_name in DICT.items():
+            assert model.objects.count() == csv_rows(csv_name), (
+                f'Проверьте, что команда `import_data` загружает все строки '
+                f'из `{csv_name}`.'
+            )
+        assert not checkpoint.exists()
+        assert Title.objects.filter(rating__isnull=False).exists(), (
+            'Проверьте, что после импорта пересчитывается рейтинг '
+            'произведений.'
+        )
+
+    def test_02_resume_from_checkpoint(self, tmp_path):
+        from reviews.management.commands.import_data import DICT
+        from reviews.models import Comment
+
+        checkpoint = tmp_path / 'checkpoint.json'
+        call_command(
+            'import_data', path=DATA_PATH, checkpoint=str(checkpoint)
+        )
+        Comment.objects.all().delete()
+        state = {csv_name: csv_rows(csv_name) for csv_name in DICT.values()}
+        state['comments.csv'] = 1
+        checkpoint.write_text(json.dumps(state))
+
+        call_command(
+            'import_data', path=DATA_PATH, checkpoint=str(checkpoint),
+            resume=True
+        )
+        assert Comment.objects.count() == csv_rows('comments.csv') - 1, (
+            'Проверьте, что `import_data --resume` продолжает загрузку с '
+            'контрольной точки.'
+        )
+
+    def test_03_resume_after_uncommitted_checkpoint(self, tmp_path):
+        from reviews.management.commands.import_data import DICT
+        from reviews.models import Comment
+
+        checkpoint = tmp_path / 'checkpoint.json'
+        call_command(
+            'import_data', path=DATA_PATH, checkpoint=str(checkpoint)
+        )
+        with open(os.path.join(DATA_PATH, 'comments.csv'),
+                  encoding='utf8') as file:
+            saved = [row['id'] for row in islice(csv.DictReader(file), 5)]
+        Comment.objects.exclude(pk__in=saved).delete()
+        state = {csv_name: csv_rows(csv_name) for csv_name in DICT.values()}
+        state['comments.csv'] = 1
+        checkpoint.write_text(json.dumps(state))
+
+        call_command(
+            'import_data', path=DATA_PATH, checkpoint=str(checkpoint),
+            resume=True, batch_size=2
+        )
+        assert Comment.objects.count() == csv_rows('comments.csv'), (
+            'Проверьте, что `import_data --resume` пропускает строки, '
+            'сохранённые после последней записи контрольной точки.'
+        )
+
+    def test_03_schedule_respects_dependencies(self):
+        from reviews.management.commands.import_data import (DEPENDENCIES,
+                                                             run_now, schedule)
+
+        order = [
+            model for model, _ in schedule(
+                DEPENDENCIES, lambda model: run_now(lambda: model)
+            )
+        ]
+        assert sorted(order, key=str) == sorted(DEPENDENCIES, key=str)
+        for model, requires in DEPENDENCIES.items():
+            for required in requires:
+                assert order.index(required) < order.index(model), (
+                    f'Проверьте, что `{model.__name__}` загружается после '
+                    f'`{required.__name__}`.'
+                )
+        with pytest.raises(ValueError):
+            list(schedule(
+                {'a': ('b',), 'b': ('a',)}, lambda key: run_now(lambda: key)
+            ))
+
+    def test_04_import_with_workers(self, tmp_path):
+        from reviews.models import Review
+
+        call_command(
+            'import_data', path=DATA_PATH, workers=3,
+            checkpoint=str(tmp_path / 'checkpoint.json')
+        )
+        assert Review.objects.count() == csv_rows('review.csv')
+
+    def test_04_import_with_workers_to_file_db(self, tmp_path):
+        database = tmp_path / 'db.sqlite3'
+        (tmp_path / 'file_db_settings.py').write_text(
+            'from api_yamdb.settings import *  # noqa\n'
+            f'DATABASES[\'default\'][\'NAME\'] = {str(database)!r}\n'
+        )
+        env = dict(
+            os.environ, DJANGO_SETTINGS_MODULE='file_db_settings',
+            PYTHONPATH=os.pathsep.join((str(tmp_path), MANAGE_PATH))
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', WORKERS_SCRIPT, DATA_PATH,
+             str(tmp_path / 'checkpoint.json')],
+            cwd=MANAGE_PATH, env=env, capture_output=True, text=True
+        )
+        assert result.returncode == 0, result.stderr
+        with sqlite3.connect(database) as db:
+            reviews, = db.execute(
+                'SELECT COUNT(*) FROM reviews_review'
+            ).fetchone()
+        assert reviews == csv_rows('review.csv'), (
+            'Проверьте, что `import_data --workers` загружает данные '
+            'в файловую базу SQLite параллельными процессами.'
+        )
+
+    def index_names(self):
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+            return sorted(row[0] for row in cursor.fetchall())
+
+    def test_05_fast_import(self, tmp_path):
+        from django.core.management.base import CommandError
+        from reviews.models import Comment
+
+        indexes = self.index_names()
+        call_command(
+            'import_data', path=DATA_PATH, fast=True,
+            checkpoint=str(tmp_path / 'checkpoint.json')
+        )
+        assert Comment.objects.count() == csv_rows('comments.csv')
+        assert self.index_names() == indexes, (
+            'Проверьте, что `import_data --fast` пересоздаёт индексы после '
+            'загрузки.'
+        )
+        with pytest.raises(CommandError):
+            call_command(
+                'import_data', path=DATA_PATH, fast=True,
+                checkpoint=str(tmp_path / 'checkpoint.json')
+            )
+
+    def test_06_fast_import_checks_foreign_keys(self, tmp_path):
+        from django.core.management.base import CommandError
+
+        for csv_name in os.listdir(DATA_PATH):
+            with open(os.path.join(DATA_PATH, csv_name),
+                      encoding='utf8') as source:
+                data = source.read()
+            if csv_name == 'comments.csv':
+                data = data.replace('\n1,6,', '\n1,9999,', 1)
+            (tmp_path / csv_name).write_text(data, encoding='utf8')
+        with pytest.raises(CommandError):
+            call_command(
+                'import_data', path=str(tmp_path), fast=True,
+                checkpoint=str(tmp_path / 'checkpoint.json')
+            )
+        assert self.index_names()
@@ -0,0 +1,62 @@
+import csv
+from collections import Counter
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Max, Min
+from django.utils.dateparse import parse_datetime
+
+SIZES = {
+    'users': 30, 'genres': 5, 'categories': 3, 'titles': 40,
+    'reviews': 500, 'comments': 300,
+}
+
+
+def generate(path, seed=7):
+    call_command('generate_data', path=str(path), seed=seed, **SIZES)
+    return {
+        file.name: file.read_bytes() for file in sorted(path.iterdir())
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14GenerateData:
+
+    def test_01_deterministic(self, tmp_path):
+        first = generate(tmp_path / 'first')
+        assert first == generate(tmp_path / 'second'), (
+            'Проверьте, что `generate_data` с одинаковым `--seed` '
+            'создаёт одинаковые файлы.'
+        )
+        assert first != generate(tmp_path / 'other', seed=8)
+
+    def test_02_importable_and_skewed(self, tmp_path):
+        from reviews.models import Comment, CustomUser, Review, Title
+
+        generate(tmp_path)
+        with open(tmp_path / 'review.csv', encoding='utf8') as file:
+            reviews = list(csv.DictReader(file))
+        assert len(reviews) == SIZES['reviews']
+        popularity = Counter(review['title_id'] for review in reviews)
+        assert popularity['1'] > popularity[str(SIZES['titles'])], (
+            'Проверьте, что популярность произведений неравномерна.'
+        )
+
+        call_command(
+            'import_data', path=str(tmp_path),
+            checkpoint=str(tmp_path / 'checkpoint.json')
+        )
+        assert CustomUser.objects.count() == SIZES['users']
+        assert Title.objects.count() == SIZES['titles']
+        assert Review.objects.count() == SIZES['reviews']
+        assert Comment.objects.count() == SIZES['comments']
+        review = Review.objects.get(pk=reviews[0]['id'])
+        assert review.pub_date == parse_datetime(reviews[0]['pub_date']), (
+            'Проверьте, что `import_data` сохраняет даты публикации из '
+            'CSV-файла.'
+        )
+        dates = Review.objects.aggregate(
+            first=Min('pub_date'), last=Max('pub_date')
+        )
+        assert dates['last'] - dates['first'] > timedelta(days=365)
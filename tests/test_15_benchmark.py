@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15Benchmark:
+
+    def test_01_benchmark_baseline(self, tmp_path):
+        from django.core.cache import cache
+        from reviews.models import CustomUser, OutboxEmail
+
+        call_command(
+            'generate_data', path=str(tmp_path), users=20, titles=10,
+            reviews=50, comments=50
+        )
+        call_command(
+            'import_data', path=str(tmp_path),
+            checkpoint=str(tmp_path / 'checkpoint.json')
+        )
+        baseline = tmp_path / 'baseline.json'
+        cache.set('foreign-key', 'value')
+        call_command(
+            'benchmark', requests=2, baseline=str(baseline),
+            update_baseline=True
+        )
+        assert not CustomUser.objects.filter(
+            username='benchmark-admin'
+        ).exists(), (
+            'Проверьте, что `benchmark` удаляет созданного для замеров '
+            'администратора.'
+        )
+        assert not OutboxEmail.objects.exists(), (
+            'Проверьте, что `benchmark` удаляет письма, поставленные в '
+            'очередь во время замеров.'
+        )
+        assert cache.get('foreign-key') == 'value', (
+            'Проверьте, что `benchmark` не очищает настроенные кэши.'
+        )
+        results = json.loads(baseline.read_text())
+        assert results['titles-list']['status'] == 200
+        assert results['review-list']['queries'] is not None
+        assert results['titles-list']['queries'] > 1, (
+            'Проверьте, что `benchmark` замеряет список произведений без '
+            'кэша ответов.'
+        )
+
+        call_command(
+            'benchmark', requests=2, baseline=str(baseline), threshold=1000
+        )
+
+        faster = {
+            name: dict(result, p95=result['p95'] / 10 ** 5)
+            for name, result in results.items()
+        }
+        baseline.write_text(json.dumps(faster))
+        call_command(
+            'benchmark', requests=2, baseline=str(baseline), threshold=1000
+        )
+        faster['review-list']['p95'] /= 10 ** 5
+        baseline.write_text(json.dumps(faster))
+        with pytest.raises(CommandError, match='review-list: p95'):
+            call_command(
+                'benchmark', requests=2, baseline=str(baseline),
+                threshold=1000
+            )
+
+        results['review-list']['queries'] -= 1
+        baseline.write_text(json.dumps(results))
+        with pytest.raises(CommandError):
+            call_command(
+                'benchmark', requests=2, baseline=str(baseline),
+                threshold=1000
+            )
+
+        del results['review-list']
+        baseline.write_text(json.dumps(results))
+        with pytest.raises(CommandError, match='review-list'):
+            call_command(
+                'benchmark', requests=2, baseline=str(baseline),
+                threshold=1000
+            )
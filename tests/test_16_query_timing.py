@@ -0,0 +1,68 @@
+import re
+
+import pytest
+from rest_framework.test import APIClient
+
+from tests.utils import (count_queries, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16QueryTiming:
+
+    def test_01_disabled_by_default(self, client):
+        response = client.get('/api/v1/categories/')
+        assert 'Server-Timing' not in response
+
+    def test_02_server_timing_and_stats(self, settings, admin_client):
+        from api.middleware import get_stats, reset_stats
+
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Отзыв', 5)
+        settings.API_QUERY_TIMING = True
+        reset_stats()
+        client = APIClient()
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        queries = count_queries(client, url)
+        response = client.get(url)
+
+        server_timing = response.get('Server-Timing', '')
+        assert re.search(r'db;dur=[\d.]+;desc="\d+ queries"', server_timing), (
+            'Проверьте, что ответ содержит заголовок `Server-Timing` со '
+            'временем запросов к БД.'
+        )
+        assert f'desc="{queries} queries"' in server_timing
+        assert re.search(r'serialize;dur=[\d.]+', server_timing), (
+            'Проверьте, что заголовок `Server-Timing` содержит время '
+            'сериализации.'
+        )
+        assert 'render;dur=' in server_timing
+        assert 'total;dur=' in server_timing
+
+        stats = get_stats()['ReviewViewSet.list']
+        assert stats['requests'] == 2
+        assert stats['queries'] == 2 * queries
+        assert stats['total_time'] >= stats['db_time'] > 0
+        assert stats['total_time'] > stats['serialize_time'] > 0
+
+    def test_03_stats_in_metrics(self, settings, client):
+        from api.metrics import registry
+
+        settings.API_QUERY_TIMING = True
+        settings.API_METRICS = True
+        registry.reset()
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/categories/')
+        text = client.get('/metrics').content.decode()
+        assert re.search(
+            r'^view_requests_total\{view="CategoryViewSet.list"\} 2$',
+            text, re.MULTILINE
+        ), (
+            'Проверьте, что показатели по представлениям отдаются по '
+            '`/metrics`.'
+        )
+        for name in ('view_db_queries_total', 'view_db_seconds_total',
+                     'view_serialize_seconds_total',
+                     'view_render_seconds_total',
+                     'view_duration_seconds_total'):
+            assert f'{name}{{view="CategoryViewSet.list"}}' in text
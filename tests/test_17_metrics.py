@@ -0,0 +1,164 @@
+import json
+import os
+import re
+import threading
+
+import pytest
+from django.core.management import call_command
+
+from tests.test_13_import_data import DATA_PATH, csv_rows
+
+
+def sample(text, line):
+    match = re.search(rf'^{re.escape(line)} ([\d.]+)$', text, re.MULTILINE)
+    assert match, f'Проверьте, что `/metrics` содержит строку `{line}`.'
+    return float(match.group(1))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Metrics:
+
+    @pytest.fixture(autouse=True)
+    def reset_registry(self, settings):
+        from api.metrics import registry
+
+        settings.API_METRICS = True
+        registry.reset()
+
+    def test_01_request_metrics(self, client):
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/titles/100500/')
+        response = client.get('/metrics')
+
+        assert response.status_code == 200, (
+            'Проверьте, что эндпоинт `/metrics` доступен.'
+        )
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert '# TYPE http_request_duration_seconds histogram' in text
+        assert sample(
+            text,
+            'http_requests_total{method="GET",status="200",'
+            'view="CategoryViewSet.list"}'
+        ) == 2
+        assert sample(
+            text,
+            'http_requests_total{method="GET",status="404",'
+            'view="TitleViewSet.retrieve"}'
+        ) == 1
+        assert sample(
+            text,
+            'http_request_duration_seconds_count'
+            '{view="CategoryViewSet.list"}'
+        ) == 2
+        assert sample(
+            text,
+            'db_queries_per_request_bucket'
+            '{view="CategoryViewSet.list",le="+Inf"}'
+        ) == 2
+        assert sample(
+            text,
+            'api_cache_requests_total{namespace="categories",result="hit"}'
+        ) == 1
+        assert sample(
+            text,
+            'api_cache_requests_total{namespace="categories",result="miss"}'
+        ) == 1
+
+    def test_02_disabled(self, client, settings):
+        settings.API_METRICS = False
+        assert client.get('/metrics').status_code == 404
+
+    def test_02_disabled_by_default(self):
+        from api_yamdb import settings
+
+        assert settings.API_METRICS is False, (
+            'Проверьте, что `/metrics` без аутентификации выключен по '
+            'умолчанию.'
+        )
+
+    def test_03_multiprocess_aggregation(self, client, settings, tmp_path):
+        from api.metrics import registry
+
+        settings.METRICS_MULTIPROC_DIR = str(tmp_path)
+        (tmp_path / 'metrics_1.json').write_text(json.dumps([
+            ['http_requests_total',
+             [['method', 'GET'], ['status', 200],
+              ['view', 'CategoryViewSet.list']], 3],
+        ]))
+        client.get('/api/v1/categories/')
+        registry.flush(force=True)
+        assert len(list(tmp_path.glob('metrics_*.json'))) == 2, (
+            'Проверьте, что процесс сохраняет свои метрики в '
+            '`METRICS_MULTIPROC_DIR`.'
+        )
+        text = client.get('/metrics').content.decode()
+        assert sample(
+            text,
+            'http_requests_total{method="GET",status="200",'
+            'view="CategoryViewSet.list"}'
+        ) == 4, (
+            'Проверьте, что `/metrics` суммирует метрики всех процессов.'
+        )
+
+    def test_03_reused_pid(self, client, settings, tmp_path):
+        from api.metrics import registry
+
+        settings.METRICS_MULTIPROC_DIR = str(tmp_path)
+        (tmp_path / f'metrics_{os.getpid()}_dead.json').write_text(
+            json.dumps([['import_rows_total', [['table', 'reviews_title']], 3]])
+        )
+        registry.inc('import_rows_total', {'table': 'reviews_title'})
+        registry.flush(force=True)
+        assert len(list(tmp_path.glob('metrics_*.json'))) == 2, (
+            'Проверьте, что процесс с повторно выданным pid не затирает '
+            'файл метрик завершившегося процесса.'
+        )
+        assert sample(
+            client.get('/metrics').content.decode(),
+            'import_rows_total{table="reviews_title"}'
+        ) == 4
+
+    def test_03_concurrent_flush(self, settings, tmp_path):
+        from api.metrics import registry
+
+        settings.METRICS_MULTIPROC_DIR = str(tmp_path)
+        registry.inc('import_rows_total', {'table': 'reviews_title'})
+        errors = []
+
+        def flush():
+            try:
+                for _ in range(20):
+                    registry.flush(force=True)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=flush) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == [], (
+            'Проверьте, что одновременная запись метрик из нескольких '
+            'потоков не приводит к ошибкам.'
+        )
+        assert [path.name for path in tmp_path.iterdir()] == [
+            registry.file_name
+        ]
+        assert json.loads(
+            (tmp_path / registry.file_name).read_text()
+        ) == registry.snapshot()
+
+    def test_04_import_throughput(self, client, tmp_path):
+        call_command(
+            'import_data', path=DATA_PATH,
+            checkpoint=str(tmp_path / 'checkpoint.json')
+        )
+        text = client.get('/metrics').content.decode()
+        assert sample(
+            text, 'import_rows_total{table="reviews_title"}'
+        ) == csv_rows('titles.csv')
+        assert sample(
+            text, 'import_duration_seconds_total{table="reviews_title"}'
+        ) > 0
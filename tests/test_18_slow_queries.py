@@ -0,0 +1,75 @@
+import logging
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def slow_query_records(caplog, settings):
+    from api import middleware
+
+    middleware._slow_queries.clear()
+    logger = logging.getLogger('api.slow_queries')
+    logger.addHandler(caplog.handler)
+    settings.API_SLOW_QUERY_MS = 0
+    yield caplog
+    logger.removeHandler(caplog.handler)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18SlowQueries:
+
+    def test_01_disabled_by_default(self, client, caplog):
+        logger = logging.getLogger('api.slow_queries')
+        logger.addHandler(caplog.handler)
+        try:
+            client.get('/api/v1/categories/')
+        finally:
+            logger.removeHandler(caplog.handler)
+        assert not caplog.records
+
+    def test_02_log_with_plan(self, admin_client, slow_query_records):
+        from rest_framework.test import APIClient
+
+        create_titles(admin_client)
+        client = APIClient()
+        client.get('/api/v1/titles/?year=1984')
+
+        messages = [record.getMessage() for record in slow_query_records.records]
+        title_queries = [
+            message for message in messages
+            if 'TitleViewSet.list' in message and 'reviews_title' in message
+        ]
+        assert title_queries, (
+            'Проверьте, что медленные запросы записываются в журнал '
+            '`api.slow_queries` с именем представления.'
+        )
+        assert 'план:' in title_queries[0], (
+            'Проверьте, что для SELECT в журнал записывается план запроса.'
+        )
+
+    def test_03_rate_limit(self, client, slow_query_records):
+        client.get('/api/v1/genres/?search=a')
+        count = len(slow_query_records.records)
+        assert count
+        client.get('/api/v1/genres/?search=a')
+        assert len(slow_query_records.records) == count, (
+            'Проверьте, что один и тот же запрос записывается в журнал не '
+            'чаще раза в `API_SLOW_QUERY_INTERVAL` секунд.'
+        )
+
+    def test_04_bounded_memory(self, monkeypatch):
+        from api import middleware
+
+        monkeypatch.setattr(middleware, 'SLOW_QUERY_MEMO_SIZE', 10)
+        middleware._slow_queries.clear()
+        for number in range(100):
+            middleware.should_log_slow_query(f'SELECT {number}')
+        assert list(middleware._slow_queries) == [
+            f'SELECT {number}' for number in range(90, 100)
+        ], (
+            'Проверьте, что журнал медленных запросов помнит не больше '
+            '`SLOW_QUERY_MEMO_SIZE` последних запросов.'
+        )
+        assert middleware.should_log_slow_query('SELECT 99') is None
@@ -0,0 +1,42 @@
+import pytest
+from django.db import IntegrityError, connection, transaction
+
+from tests.utils import create_titles
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return ' '.join(row[-1] for row in cursor.fetchall())
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19FilterIndexes:
+
+    def test_01_genre_title_unique(self, admin_client):
+        from reviews.models import GenreTitle
+
+        create_titles(admin_client)
+        genre_title = GenreTitle.objects.first()
+        with pytest.raises(IntegrityError), transaction.atomic():
+            GenreTitle.objects.create(
+                title_id=genre_title.title_id, genre_id=genre_title.genre_id
+            )
+
+    @pytest.mark.parametrize('filters, index', (
+        ({'genre': 'drama'}, 'genretitle_genre_title_idx'),
+        ({'category': 'films', 'year': 1984}, 'title_category_year_idx'),
+        ({'name': 'Терминатор'}, 'title_name_idx'),
+    ))
+    def test_02_filter_plans(self, admin_client, filters, index):
+        if connection.vendor != 'sqlite':
+            pytest.skip('План проверяется только для SQLite')
+        from api.filters import TitleFilter
+        from reviews.models import Title
+
+        create_titles(admin_client)
+        queryset = TitleFilter(filters, Title.objects.all()).qs
+        assert index in query_plan(queryset), (
+            f'Проверьте, что фильтр {filters} использует индекс `{index}`.'
+        )
@@ -0,0 +1,70 @@
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Search:
+
+    def test_01_title_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+
+        response = client.get('/api/v1/titles/?search=терминат')
+        assert response.status_code == 200
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id']
+        ], (
+            'Проверьте, что параметр `search` эндпоинта `/api/v1/titles/` '
+            'ищет произведения по началу слова в названии.'
+        )
+        response = client.get('/api/v1/titles/?search=yippie')
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id']
+        ], 'Проверьте, что поиск произведений учитывает описание.'
+
+    def test_02_index_follows_changes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Чужой'}
+        )
+        response = client.get('/api/v1/titles/?search=чужой')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+        assert client.get(
+            '/api/v1/titles/?search=терминатор'
+        ).json()['count'] == 0
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert client.get(
+            '/api/v1/titles/?search=чужой'
+        ).json()['count'] == 0
+
+    def test_03_review_search_ranked(self, client, admin_client,
+                                     user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(
+            admin_client, titles[0]['id'], 'Хороший фильм про роботов', 8
+        )
+        best = create_single_review(
+            user_client, titles[1]['id'], 'Роботы, роботы и снова роботы', 9
+        ).json()
+        create_single_review(
+            moderator_client, titles[1]['id'], 'Скучно', 3
+        )
+
+        response = client.get('/api/v1/reviews/?search=робот')
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == 2, (
+            'Проверьте, что `/api/v1/reviews/?search=` возвращает отзывы, '
+            'содержащие искомое слово.'
+        )
+        assert results[0]['id'] == best['id'], (
+            'Проверьте, что результаты поиска отзывов отсортированы по '
+            'релевантности.'
+        )
+        assert results[0]['title'] == titles[1]['id']
+
+    def test_04_review_search_requires_query(self, client):
+        assert client.get('/api/v1/reviews/').status_code == 400
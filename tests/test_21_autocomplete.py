@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+
+from tests.utils import count_queries, create_single_review, create_titles
+
+URL = '/api/v1/autocomplete/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Autocomplete:
+
+    def test_01_prefix_match(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+
+        response = client.get(f'{URL}?q=ОРЕ')
+        assert response.status_code == 200
+        data = response.json()
+        assert [title['id'] for title in data['titles']] == [
+            titles[1]['id']
+        ], (
+            'Проверьте, что подсказки находят произведения по началу любого '
+            'слова названия без учёта регистра.'
+        )
+        assert data['genres'] == [] and data['categories'] == []
+
+        data = client.get(f'{URL}?q=ко&type=genres').json()
+        assert list(data) == ['genres']
+        assert [genre['slug'] for genre in data['genres']] == ['comedy']
+
+    def test_02_ranked_by_rating(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            f'/api/v1/titles/{titles[1]["id"]}/', data={'name': 'Терем'}
+        )
+        client.get(f'{URL}?q=тер')
+        create_single_review(user_client, titles[1]['id'], 'Отлично', 10)
+        create_single_review(admin_client, titles[0]['id'], 'Неплохо', 5)
+
+        data = client.get(f'{URL}?q=тер&limit=1').json()
+        assert [title['id'] for title in data['titles']] == [
+            titles[1]['id']
+        ], (
+            'Проверьте, что подсказки отсортированы по рейтингу и '
+            'обновляются при изменении оценок.'
+        )
+        assert data['titles'][0]['rating'] == 10
+
+    def test_03_incremental_updates(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        client.get(f'{URL}?q=чуж')
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Чужой'}
+        )
+        assert [
+            title['id'] for title in client.get(f'{URL}?q=чуж').json()[
+                'titles'
+            ]
+        ] == [titles[0]['id']], (
+            'Проверьте, что индекс подсказок обновляется при изменении '
+            'названия.'
+        )
+        assert client.get(f'{URL}?q=терм').json()['titles'] == []
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert client.get(f'{URL}?q=чуж').json()['titles'] == []
+
+    def test_04_no_queries(self, client, admin_client):
+        create_titles(admin_client)
+        client.get(f'{URL}?q=т')
+        assert count_queries(client, f'{URL}?q=те') == 0, (
+            'Проверьте, что подсказки не выполняют запросов к БД.'
+        )
+
+    def test_05_validation(self, client):
+        assert client.get(f'{URL}?q=a&limit=0').status_code == 400
+        assert client.get(f'{URL}?q=a&type=users').status_code == 400
+
+    def test_06_group_counts(self, client, admin_client):
+        from api.autocomplete import CATEGORIES, GENRES, index
+
+        def counts(kind):
+            return {
+                data['slug']: rank[0]
+                for rank, data, _ in index.entries[kind].values()
+            }
+
+        titles, _, _ = create_titles(admin_client)
+        client.get(f'{URL}?q=т')
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            data={'genre': ['drama'], 'category': 'books'}
+        )
+        assert counts(GENRES) == {'horror': 0, 'comedy': 0, 'drama': 2}, (
+            'Проверьте, что число произведений жанра в подсказках '
+            'обновляется при изменении жанров произведения.'
+        )
+        assert counts(CATEGORIES) == {'films': 0, 'books': 2}, (
+            'Проверьте, что число произведений категории в подсказках '
+            'обновляется при изменении категории произведения.'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert counts(GENRES)['drama'] == 1
+        assert counts(CATEGORIES)['books'] == 1
+
+    def test_07_single_rebuild(self, settings, monkeypatch):
+        from api.autocomplete import index
+
+        index.build()
+        settings.API_AUTOCOMPLETE_MAX_AGE = 0
+        builds = []
+        started, release = threading.Event(), threading.Event()
+
+        def slow_build():
+            builds.append(threading.current_thread())
+            started.set()
+            release.wait(5)
+            index.built_at = time.monotonic()
+
+        monkeypatch.setattr(index, 'build', slow_build)
+        thread = threading.Thread(target=index.ensure_built)
+        thread.start()
+        started.wait(5)
+        index.ensure_built()
+        release.set()
+        thread.join()
+        assert builds == [thread], (
+            'Проверьте, что устаревший индекс подсказок перестраивает один '
+            'поток, а остальные отвечают по прежнему индексу.'
+        )
@@ -0,0 +1,50 @@
+import pytest
+
+from tests.utils import count_queries, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22Facets:
+
+    def test_01_facets(self, client, admin_client):
+        create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Матрица', 'year': 1999, 'genre': ['drama'],
+            'category': 'films', 'description': 'Красная или синяя'
+        })
+
+        response = client.get('/api/v1/titles/?facets=true')
+        assert response.status_code == 200
+        facets = response.json().get('facets')
+        assert facets == {
+            'genre': {'comedy': 1, 'drama': 2, 'horror': 1},
+            'category': {'books': 1, 'films': 2},
+            'year': {'1980-1989': 2, '1990-1999': 1},
+        }, (
+            'Проверьте, что при `?facets=true` ответ `/api/v1/titles/` '
+            'содержит количество произведений по жанрам, категориям и '
+            'десятилетиям.'
+        )
+        assert len(response.json()['results']) == 3
+
+    def test_02_facets_follow_filters(self, client, admin_client):
+        create_titles(admin_client)
+        facets = client.get(
+            '/api/v1/titles/?facets=true&category=films'
+        ).json()['facets']
+        assert facets == {
+            'genre': {'comedy': 1, 'horror': 1},
+            'category': {'films': 1},
+            'year': {'1980-1989': 1},
+        }, 'Проверьте, что фасеты считаются для текущего фильтра.'
+
+    def test_03_grouped_queries(self, client, admin_client):
+        create_titles(admin_client)
+        assert 'facets' not in client.get('/api/v1/titles/').json()
+        plain = count_queries(client, '/api/v1/titles/?year=1984')
+        faceted = count_queries(
+            client, '/api/v1/titles/?year=1984&facets=true'
+        )
+        assert faceted - plain == 3, (
+            'Проверьте, что каждый фасет считается одним запросом.'
+        )
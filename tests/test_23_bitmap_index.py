@@ -0,0 +1,149 @@
+import threading
+import time
+
+import pytest
+
+from tests.utils import count_queries, create_titles
+
+FILTERS = (
+    'genre=comedy',
+    'genre=drama&year=1999',
+    'category=films',
+    'category=films&genre=comedy&page=2',
+    'year=1988',
+    'genre=missing',
+)
+
+
+def title_ids(client, query):
+    data = client.get(f'/api/v1/titles/?{query}').json()
+    return data['count'], [title['id'] for title in data['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23BitmapIndex:
+
+    @pytest.fixture
+    def titles(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        for year in range(1990, 2000):
+            admin_client.post('/api/v1/titles/', data={
+                'name': f'Фильм {year}', 'year': year,
+                'genre': ['drama', 'comedy'][year % 2:],
+                'category': 'films', 'description': 'Описание'
+            })
+        return titles
+
+    def test_01_same_results(self, client, settings, titles):
+        expected = {query: title_ids(client, query) for query in FILTERS}
+        settings.API_BITMAP_INDEX = True
+        for query in FILTERS:
+            assert title_ids(client, query) == expected[query], (
+                f'Проверьте, что фильтрация `?{query}` по битовым картам '
+                'совпадает с фильтрацией в БД.'
+            )
+
+    def test_02_page_only_queries(self, client, settings, titles):
+        url = '/api/v1/titles/?genre=comedy&category=films'
+        plain = count_queries(client, url)
+        settings.API_BITMAP_INDEX = True
+        client.get(f'{url}&page=1')
+        assert count_queries(client, f'{url}&page=2') < plain, (
+            'Проверьте, что при фильтрации по битовым картам из БД '
+            'загружается только страница произведений.'
+        )
+
+    def test_03_follows_changes(self, client, admin_client, settings,
+                                titles):
+        settings.API_BITMAP_INDEX = True
+        assert title_ids(client, 'genre=horror') == (1, [titles[0]['id']])
+        admin_client.patch(
+            f'/api/v1/titles/{titles[1]["id"]}/',
+            data={'genre': ['horror'], 'year': 1985}
+        )
+        assert title_ids(client, 'genre=horror&year=1985') == (
+            1, [titles[1]['id']]
+        ), (
+            'Проверьте, что индекс обновляется при изменении жанров и '
+            'года произведения.'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert title_ids(client, 'genre=horror') == (1, [titles[1]['id']])
+        admin_client.delete('/api/v1/categories/films/')
+        assert title_ids(client, 'category=films') == (0, [])
+
+    def test_04_single_rebuild(self, settings, monkeypatch):
+        from api.bitmap import index
+
+        index.build()
+        settings.API_BITMAP_INDEX_MAX_AGE = 0
+        builds = []
+        started, release = threading.Event(), threading.Event()
+
+        def slow_build():
+            builds.append(threading.current_thread())
+            started.set()
+            release.wait(5)
+            index.built_at = time.monotonic()
+
+        monkeypatch.setattr(index, 'build', slow_build)
+        thread = threading.Thread(target=index.ensure_built)
+        thread.start()
+        started.wait(5)
+        index.ensure_built()
+        release.set()
+        thread.join()
+        assert builds == [thread], (
+            'Проверьте, что устаревшие битовые карты перестраивает один '
+            'поток, а остальные фильтруют по прежним.'
+        )
+
+    def test_05_validators_without_join(self, client, settings, titles):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from api.bitmap import index
+
+        settings.API_BITMAP_INDEX = True
+        index.build()
+        url = '/api/v1/titles/?genre=comedy&category=films&page=2'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        assert not [
+            query for query in context.captured_queries
+            if 'genretitle' in query['sql'].lower()
+            and 'max(' in query['sql'].lower()
+        ], (
+            'Проверьте, что ETag списка, отфильтрованного по битовым '
+            'картам, считается без запроса с JOIN жанров.'
+        )
+        etag = response['ETag']
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == 304
+
+    def test_06_direct_genre_link(self, client, settings, titles):
+        from api.autocomplete import GENRES
+        from api.autocomplete import index as autocomplete
+        from reviews.models import Genre, GenreTitle, Title
+
+        settings.API_BITMAP_INDEX = True
+        assert title_ids(client, 'genre=horror') == (1, [titles[0]['id']])
+        autocomplete.build()
+        horror = Genre.objects.get(slug='horror')
+        updated_at = Title.objects.get(pk=titles[1]['id']).updated_at
+        link = GenreTitle.objects.create(
+            title_id=titles[1]['id'], genre=horror
+        )
+        assert title_ids(client, 'genre=horror') == (
+            2, [titles[0]['id'], titles[1]['id']]
+        ), (
+            'Проверьте, что индекс обновляется при сохранении связи '
+            '`GenreTitle` напрямую.'
+        )
+        assert Title.objects.get(pk=titles[1]['id']).updated_at > updated_at
+        assert autocomplete.entries[GENRES][horror.pk][0] == (2,)
+        link.delete()
+        assert title_ids(client, 'genre=horror') == (1, [titles[0]['id']])
+        assert autocomplete.entries[GENRES][horror.pk][0] == (1,)
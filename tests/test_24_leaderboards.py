@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from tests.utils import create_single_review, create_titles
+
+
+def ids(response):
+    assert response.status_code == 200
+    return [title['id'] for title in response.json()]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Leaderboards:
+
+    @pytest.fixture
+    def titles(self, admin_client, user_client, moderator_client, settings):
+        settings.RANKING_PRIOR_REVIEWS = 10
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Плохой фильм', 'year': 2000, 'genre': ['drama'],
+            'category': 'films', 'description': 'Описание'
+        })
+        titles.append(response.json())
+        create_single_review(admin_client, titles[0]['id'], 'Отлично', 10)
+        for client in (admin_client, user_client, moderator_client):
+            create_single_review(client, titles[1]['id'], 'Хорошо', 9)
+            create_single_review(client, titles[2]['id'], 'Плохо', 1)
+        call_command('rebuild_rankings')
+        return [title['id'] for title in titles]
+
+    def test_01_top_bayesian(self, client, titles):
+        assert ids(client.get('/api/v1/leaderboards/top/')) == [
+            titles[1], titles[0], titles[2]
+        ], (
+            'Проверьте, что лидерборд `top` учитывает количество отзывов: '
+            'три оценки 9 должны быть выше одной оценки 10.'
+        )
+        data = client.get('/api/v1/leaderboards/top/?genre=drama').json()
+        assert [title['id'] for title in data] == [titles[1], titles[2]], (
+            'Проверьте, что лидерборд `top` поддерживает фильтр по жанру.'
+        )
+        assert data[0]['score'] > data[1]['score']
+        assert ids(client.get('/api/v1/leaderboards/top/?limit=1')) == [
+            titles[1]
+        ]
+        assert client.get(
+            '/api/v1/leaderboards/top/?limit=0'
+        ).status_code == 400
+
+    def test_02_review_updates_ranking(self, client, user_client,
+                                       moderator_client, titles):
+        create_single_review(user_client, titles[0], 'Отлично', 10)
+        create_single_review(moderator_client, titles[0], 'Отлично', 10)
+        assert ids(client.get('/api/v1/leaderboards/top/'))[0] == titles[0], (
+            'Проверьте, что новый отзыв сразу обновляет взвешенный рейтинг '
+            'произведения.'
+        )
+
+    def test_03_ordering_by_rating(self, client, titles):
+        response = client.get('/api/v1/titles/?ordering=-rating')
+        assert [
+            title['id'] for title in response.json()['results']
+        ] == [titles[1], titles[0], titles[2]], (
+            'Проверьте, что `ordering=-rating` сортирует произведения по '
+            'взвешенному рейтингу.'
+        )
+
+    def test_04_trending(self, client, titles):
+        from reviews.models import Review, TitleRanking
+
+        Review.objects.filter(title_id=titles[1]).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        call_command('rebuild_rankings')
+        assert TitleRanking.objects.count() == 3
+        assert ids(client.get('/api/v1/leaderboards/trending/')) == [
+            titles[2], titles[0]
+        ], (
+            'Проверьте, что лидерборд `trending` учитывает только свежие '
+            'отзывы.'
+        )
+
+    def test_05_review_delete_reverts_trending(self, client, user_client,
+                                               titles):
+        from reviews.models import TitleRanking
+
+        before = TitleRanking.objects.get(title_id=titles[0]).trending_score
+        review = create_single_review(user_client, titles[0], 'Отлично', 10)
+        user_client.delete(
+            f'/api/v1/titles/{titles[0]}/reviews/{review.json()["id"]}/'
+        )
+        after = TitleRanking.objects.get(title_id=titles[0]).trending_score
+        assert after == pytest.approx(before), (
+            'Проверьте, что удаление отзыва уменьшает популярность '
+            'произведения.'
+        )
+
+    def test_06_delete_title_with_reviews(self, admin_client, titles):
+        from reviews.models import Review, Title, TitleRanking
+
+        response = admin_client.delete(f'/api/v1/titles/{titles[1]}/')
+        assert response.status_code == 204, (
+            'Проверьте, что произведение с отзывами можно удалить.'
+        )
+        assert not Title.objects.filter(pk=titles[1]).exists()
+        assert not Review.objects.filter(title_id=titles[1]).exists()
+        assert not TitleRanking.objects.filter(title_id=titles[1]).exists()
+
+    def test_07_mean_score_in_api_cache(self, settings):
+        from django.core.cache import caches
+        from reviews.rankings import MEAN_SCORE_KEY, cached_mean_score
+
+        settings.CACHES = {
+            alias: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': alias,
+            }
+            for alias in ('default', 'api')
+        }
+        settings.API_CACHE_ALIAS = 'api'
+        mean = cached_mean_score()
+        assert caches['api'].get(MEAN_SCORE_KEY) == mean, (
+            'Проверьте, что средняя оценка каталога хранится в кэше '
+            '`API_CACHE_ALIAS`.'
+        )
+        assert caches['default'].get(MEAN_SCORE_KEY) is None
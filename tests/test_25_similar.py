@@ -0,0 +1,79 @@
+import pytest
+from django.core.management import call_command
+
+from tests.utils import count_queries, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Similar:
+
+    @pytest.fixture
+    def titles(self, admin_client, user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Чужой', 'year': 1979, 'genre': ['horror'],
+            'category': 'films', 'description': 'Описание'
+        })
+        titles = [title['id'] for title in titles] + [response.json()['id']]
+        scores = {
+            admin_client: (10, 9, 1),
+            user_client: (1, 2, 10),
+            moderator_client: (8, 8, 3),
+        }
+        for client, title_scores in scores.items():
+            for title_id, score in zip(titles, title_scores):
+                create_single_review(client, title_id, 'Отзыв', score)
+        return titles
+
+    def test_01_similar(self, client, titles):
+        call_command('rebuild_similar')
+        url = f'/api/v1/titles/{titles[0]}/similar/'
+        response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что эндпоинт `{url}` доступен без авторизации.'
+        )
+        data = response.json()
+        assert [title['id'] for title in data] == [titles[1], titles[2]], (
+            'Проверьте, что похожие произведения отсортированы по косинусной '
+            'мере сходства оценок.'
+        )
+        assert 0.99 < data[0]['score'] <= 1
+        assert data[1]['score'] < data[0]['score']
+        assert [
+            title['id'] for title in client.get(f'{url}?limit=1').json()
+        ] == [titles[1]]
+
+    def test_02_batches(self, titles):
+        from reviews.models import SimilarTitle
+
+        def pairs():
+            return {
+                (pair.title_id, pair.similar_id): round(pair.score, 9)
+                for pair in SimilarTitle.objects.all()
+            }
+
+        call_command('rebuild_similar')
+        expected = pairs()
+        assert len(expected) == 6
+        call_command('rebuild_similar', batch_size=1)
+        assert pairs() == expected, (
+            'Проверьте, что результат `rebuild_similar` не зависит от '
+            'размера пакета.'
+        )
+
+    def test_03_lookup(self, client, admin_client, titles):
+        call_command('rebuild_similar')
+        url = f'/api/v1/titles/{titles[0]}/similar/'
+        client.get(url)
+        assert count_queries(client, url) == 2, (
+            'Проверьте, что похожие произведения загружаются одним запросом '
+            '(и запросом жанров).'
+        )
+        assert client.get('/api/v1/titles/999/similar/').status_code == 404
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Без отзывов', 'year': 2000, 'genre': ['drama'],
+            'category': 'films', 'description': 'Описание'
+        })
+        assert client.get(
+            f'/api/v1/titles/{response.json()["id"]}/similar/'
+        ).json() == []
@@ -0,0 +1,83 @@
+import pytest
+from django.core.management import call_command
+
+from tests.utils import count_queries, create_single_review, create_titles
+
+URL = '/api/v1/users/me/recommendations/'
+
+
+def ids(response):
+    assert response.status_code == 200
+    return [title['id'] for title in response.json()]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26Recommendations:
+
+    @pytest.fixture
+    def titles(self, admin_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        for name, genre in (('Чужой', 'horror'), ('Плохой фильм', 'drama')):
+            response = admin_client.post('/api/v1/titles/', data={
+                'name': name, 'year': 2000, 'genre': [genre],
+                'category': 'films', 'description': 'Описание'
+            })
+            titles.append(response.json())
+        titles = [title['id'] for title in titles]
+        for title_id, score in zip(titles, (10, 9, 8, 2)):
+            create_single_review(admin_client, title_id, 'Отзыв', score)
+        for title_id, score in zip(titles, (9, 8)):
+            create_single_review(moderator_client, title_id, 'Отзыв', score)
+        return titles
+
+    def test_01_recommendations(self, client, admin_client,
+                                moderator_client, titles):
+        assert client.get(URL).status_code == 401, (
+            f'Проверьте, что `{URL}` недоступен без авторизации.'
+        )
+        call_command('rebuild_recommendations')
+        data = moderator_client.get(URL).json()
+        assert [title['id'] for title in data] == [titles[2], titles[3]], (
+            'Проверьте, что рекомендации не содержат оценённых '
+            'произведений и отсортированы по ожидаемой оценке.'
+        )
+        assert data[0]['score'] > data[1]['score']
+        assert ids(admin_client.get(URL)) == []
+        assert count_queries(moderator_client, URL) == 2, (
+            'Проверьте, что рекомендации загружаются одним запросом '
+            '(и запросом жанров).'
+        )
+
+    def test_02_cold_start(self, user_client, titles):
+        call_command('rebuild_rankings')
+        assert ids(user_client.get(URL)) == titles, (
+            'Проверьте, что пользователю без рекомендаций отдаются лучшие '
+            'произведения каталога.'
+        )
+        create_single_review(user_client, titles[1], 'Отзыв', 10)
+        assert ids(user_client.get(URL)) == [titles[3]], (
+            'Проверьте, что пользователю без рекомендаций отдаются лучшие '
+            'произведения в жанрах, которые он оценивал.'
+        )
+
+    def test_03_incremental(self, user, user_client, moderator_client,
+                            titles):
+        call_command('rebuild_recommendations')
+        call_command('rebuild_recommendations', incremental=True)
+        from reviews.management.commands.rebuild_recommendations import (
+            refresh_recommendations
+        )
+        assert refresh_recommendations() == 0
+        review = create_single_review(
+            user_client, titles[0], 'Отзыв', 10
+        ).json()
+        assert refresh_recommendations() == 1, (
+            'Проверьте, что инкрементальный пересчёт затрагивает только '
+            'пользователей с новыми отзывами.'
+        )
+        assert len(ids(user_client.get(URL))) == 3
+        user_client.delete(
+            f'/api/v1/titles/{titles[0]}/reviews/{review["id"]}/'
+        )
+        assert refresh_recommendations() == 1
+        assert not user.recommendations.exists()
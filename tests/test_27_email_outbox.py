@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+URL = '/api/v1/auth/signup/'
+
+
+class FailingBackend(EmailBackend):
+    """Почтовый бэкенд, отклоняющий письма на адреса fail@..."""
+
+    opened = 0
+
+    def open(self):
+        FailingBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        if any(
+            address.startswith('fail@')
+            for message in messages for address in message.to
+        ):
+            raise ConnectionError('Сервер недоступен')
+        return super().send_messages(messages)
+
+
+class UnavailableBackend(EmailBackend):
+    """Почтовый бэкенд, к которому нельзя подключиться."""
+
+    def open(self):
+        raise ConnectionError('Сервер недоступен')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27EmailOutbox:
+
+    def test_01_signup_enqueues(self, client):
+        from reviews.models import CustomUser, OutboxEmail
+
+        data = {'username': 'new_user', 'email': 'new@yamdb.fake'}
+        response = client.post(URL, data=data)
+        assert response.status_code == 200
+        assert mail.outbox == [], (
+            'Проверьте, что регистрация не отправляет письмо сама, а ставит '
+            'его в очередь.'
+        )
+        email = OutboxEmail.objects.get()
+        user = CustomUser.objects.get(username='new_user')
+        assert email.recipient == data['email']
+        assert user.confirmation_code in email.body, (
+            'Проверьте, что в письме отправляется сохранённый код '
+            'подтверждения.'
+        )
+
+        call_command('send_emails')
+        assert [message.to for message in mail.outbox] == [[data['email']]]
+        email.refresh_from_db()
+        assert email.sent_at is not None
+        call_command('send_emails')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно.'
+        )
+
+    def test_02_batch_and_retry(self, settings):
+        from reviews.models import OutboxEmail
+        from reviews.outbox import enqueue, send_batch
+
+        settings.EMAIL_BACKEND = (
+            'tests.test_27_email_outbox.FailingBackend'
+        )
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        FailingBackend.opened = 0
+        for number in range(3):
+            enqueue(f'user{number}@yamdb.fake', 'Тема', 'Текст')
+        failing = enqueue('fail@yamdb.fake', 'Тема', 'Текст')
+
+        assert send_batch(10) == (3, 1)
+        assert FailingBackend.opened == 1, (
+            'Проверьте, что пакет писем отправляется через одно соединение.'
+        )
+        assert len(mail.outbox) == 3
+        failing.refresh_from_db()
+        assert failing.attempts == 1 and failing.sent_at is None
+        assert 'Сервер недоступен' in failing.last_error
+        assert failing.next_attempt_at > timezone.now(), (
+            'Проверьте, что неудачная попытка откладывается.'
+        )
+        assert send_batch(10) == (0, 0)
+
+        OutboxEmail.objects.filter(pk=failing.pk).update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        assert send_batch(10) == (0, 1)
+        OutboxEmail.objects.filter(pk=failing.pk).update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        assert send_batch(10) == (0, 0), (
+            'Проверьте, что после EMAIL_OUTBOX_MAX_ATTEMPTS попыток письмо '
+            'больше не отправляется.'
+        )
+
+    def test_03_connection_failure(self, settings):
+        from reviews.outbox import enqueue, send_batch
+
+        settings.EMAIL_BACKEND = (
+            'tests.test_27_email_outbox.UnavailableBackend'
+        )
+        emails = [
+            enqueue(f'user{number}@yamdb.fake', 'Тема', 'Текст')
+            for number in range(2)
+        ]
+        assert send_batch(10) == (0, 2), (
+            'Проверьте, что при ошибке соединения весь пакет считается '
+            'неотправленным.'
+        )
+        for email in emails:
+            email.refresh_from_db()
+            assert email.attempts == 1 and email.sent_at is None
+            assert 'Сервер недоступен' in email.last_error
+            assert email.next_attempt_at > timezone.now()
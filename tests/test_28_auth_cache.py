@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28AuthCache:
+
+    def test_01_no_user_query(self, user_client, monkeypatch):
+        validations = []
+        validate = JWTAuthentication.get_validated_token
+
+        def counting(self, raw_token):
+            validations.append(raw_token)
+            return validate(self, raw_token)
+
+        monkeypatch.setattr(
+            JWTAuthentication, 'get_validated_token', counting
+        )
+        url = '/api/v1/categories/'
+        assert user_client.get(url).status_code == 200
+        with CaptureQueriesContext(connection) as context:
+            assert user_client.get(url).status_code == 200
+        assert len(context.captured_queries) == 0, (
+            'Проверьте, что пользователь из токена берётся из кэша без '
+            'запроса к БД.'
+        )
+        assert len(validations) == 1, (
+            'Проверьте, что подпись токена проверяется один раз, далее '
+            'токен берётся из кэша.'
+        )
+
+    def test_02_role_change(self, user, user_client, admin_client):
+        url = '/api/v1/users/'
+        assert user_client.get(url).status_code == 403
+        response = admin_client.patch(
+            f'{url}{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == 200
+        assert user_client.get(url).status_code == 200, (
+            'Проверьте, что кэш пользователя сбрасывается при изменении '
+            'роли.'
+        )
+
+    def test_03_inactive_and_deleted(self, user, user_client):
+        url = '/api/v1/users/me/'
+        assert user_client.get(url).status_code == 200
+        user.is_active = False
+        user.save()
+        assert user_client.get(url).status_code == 401, (
+            'Проверьте, что заблокированный пользователь не проходит '
+            'аутентификацию после изменения.'
+        )
+        user.delete()
+        assert user_client.get(url).status_code == 401
+
+    def test_04_cached_user_is_model(self, user, user_client, admin_client):
+        from tests.utils import create_titles
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        user_client.get('/api/v1/users/me/')
+        response = user_client.post(url, data={'text': 'Текст', 'score': 7})
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username, (
+            'Проверьте, что закэшированный пользователь сохраняется автором '
+            'отзыва.'
+        )
@@ -0,0 +1,118 @@
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def get_token(client, user):
+    response = client.post('/api/v1/auth/token/', data={
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    assert response.status_code == 201
+    return response.json()['token']
+
+
+def token_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29TokenClaims:
+
+    def test_01_claims(self, client, moderator):
+        token = AccessToken(get_token(client, moderator))
+        assert (token['username'], token['role'], token['is_superuser']) == (
+            moderator.username, 'moderator', False
+        ), (
+            'Проверьте, что токен из `/api/v1/auth/token/` содержит имя, '
+            'роль и признак суперпользователя.'
+        )
+        assert token['ver'] == 0
+
+    def test_02_permissions_without_db(self, client, user, admin):
+        from api.authentication import users
+
+        user_client = token_client(get_token(client, user))
+        admin_client = token_client(get_token(client, admin))
+        user_client.get('/api/v1/users/')
+        admin_client.get('/api/v1/categories/')
+        users.clear()
+        with CaptureQueriesContext(connection) as context:
+            assert user_client.get('/api/v1/users/').status_code == 403
+            assert admin_client.get('/api/v1/categories/').status_code == 200
+        assert len(context.captured_queries) == 0, (
+            'Проверьте, что проверка прав по токену с ролью не обращается '
+            'к БД.'
+        )
+
+    def test_03_role_change_revokes(self, client, user, admin_client):
+        user_client = token_client(get_token(client, user))
+        assert user_client.get('/api/v1/users/').status_code == 403
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'bio': 'bio'}
+        )
+        assert user_client.get('/api/v1/users/me/').status_code == 200, (
+            'Проверьте, что изменение пользователя без смены роли не '
+            'отзывает его токены.'
+        )
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert user_client.get('/api/v1/users/').status_code == 401, (
+            'Проверьте, что смена роли отзывает выданные токены.'
+        )
+        user.refresh_from_db()
+        new_client = token_client(get_token(client, user))
+        assert new_client.get('/api/v1/users/').status_code == 200
+
+    def test_04_rename_and_delete(self, client, user):
+        user_client = token_client(get_token(client, user))
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'username': 'renamed'}
+        )
+        assert response.status_code == 200
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что смена имени отзывает выданные токены.'
+        )
+        user.refresh_from_db()
+        user_client = token_client(get_token(client, user))
+        assert user_client.get(
+            '/api/v1/users/me/'
+        ).json()['username'] == 'renamed'
+        user.delete()
+        assert user_client.get('/api/v1/users/me/').status_code == 401
+
+    def test_05_deactivation_revokes(self, client, user):
+        user_client = token_client(get_token(client, user))
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        user.is_active = False
+        user.save()
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что деактивация пользователя отзывает выданные '
+            'токены.'
+        )
+        user.is_active = True
+        user.save()
+        assert user_client.get('/api/v1/users/me/').status_code == 401
+        user_client = token_client(get_token(client, user))
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+
+    def test_06_stale_save_keeps_revocation(self, client, user, admin_client):
+        user_client = token_client(get_token(client, user))
+        for role in ('admin', 'user'):
+            admin_client.patch(
+                f'/api/v1/users/{user.username}/', data={'role': role}
+            )
+        user.bio = 'bio'
+        user.save()
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что сохранение загруженного до отзыва пользователя '
+            'не возвращает силу отозванным токенам.'
+        )
+        user.refresh_from_db()
+        assert user.bio == 'bio'